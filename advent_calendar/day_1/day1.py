@@ -18,11 +18,70 @@ What is the sum of all of the calibration values?
 *ANSWER: 54578*
 """
 import argparse
-from typing import List
+import sys
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 
-def main(input_file: str, part: int):
-    words = read_words(input_file)
+NUMBER_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+
+
+@dataclass
+class NumberAutomaton:
+    """
+    Aho-Corasick automaton that recognises every digit and number word in a single pass over a word.
+    States are indexes into the lists below; state 0 is the root of the trie.
+    """
+    transitions: List[Dict[str, int]]
+    failures: List[int]
+    outputs: List[List[Tuple[int, int]]]  # (value, length) of every pattern ending on each state
+
+
+def build_number_automaton(patterns: Dict[str, int]) -> NumberAutomaton:
+    """
+    Builds the trie of all patterns and links every state to its longest proper suffix that is also a state.
+    """
+    transitions: List[Dict[str, int]] = [{}]
+    outputs: List[List[Tuple[int, int]]] = [[]]
+    for pattern, value in patterns.items():
+        state = 0
+        for character in pattern:
+            if character not in transitions[state]:
+                transitions.append({})
+                outputs.append([])
+                transitions[state][character] = len(transitions) - 1
+            state = transitions[state][character]
+        outputs[state].append((value, len(pattern)))
+
+    # Breadth-first traversal, so that the failure of a state is always computed before its children
+    failures = [0] * len(transitions)
+    queue = deque(transitions[0].values())
+    while queue:
+        state = queue.popleft()
+        for character, next_state in transitions[state].items():
+            failure = failures[state]
+            while failure and character not in transitions[failure]:
+                failure = failures[failure]
+            failures[next_state] = transitions[failure].get(character, 0)
+            outputs[next_state] = outputs[next_state] + outputs[failures[next_state]]
+            queue.append(next_state)
+
+    return NumberAutomaton(transitions, failures, outputs)
+
+
+NUMBER_AUTOMATON = build_number_automaton(
+    {**{str(n): n for n in range(10)}, **{w: n for n, w in enumerate(NUMBER_WORDS, start=1)}}
+)
+
+
+def main(input_file: str, part: int, stream: bool = False, vectorized: bool = False):
+    if vectorized:
+        return find_calibration_value_vectorized(read_buffer(input_file), part)
+
+    # In streaming mode, words are read lazily and folded into the calibration value one by one
+    words = iter_words(input_file) if stream else read_words(input_file)
 
     if part == 1:
         return find_calibration_value_numbers(words)
@@ -30,42 +89,106 @@ def main(input_file: str, part: int):
     return find_calibration_value_numbers_and_words(words)
 
 
-def find_calibration_value_numbers(words: List[str]):
+def find_calibration_value_numbers(words: Iterable[str]):
     """
     Find the first and last number (in digit form) on each word, combine them into a single
     number, and sum them all together.
     """
     calibration_value = 0
+    num_words = 0
     for word in words:
-        first_number = [c for c in word if c.isnumeric()][0]
-        last_number = [c for c in word if c.isnumeric()][-1]
+        first_number = next(c for c in word if c.isnumeric())
+        last_number = next(c for c in reversed(word) if c.isnumeric())
         calibration_value += int(first_number + last_number)
+        num_words += 1
 
-    print(f"The calibration value of these {len(words)} words is: {calibration_value}")
+    print(f"The calibration value of these {num_words} words is: {calibration_value}")
     return calibration_value
 
 
-def find_calibration_value_numbers_and_words(words: List[str]):
-    number_words = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
-
-    new_words = []
+def find_calibration_value_numbers_and_words(words: Iterable[str]):
+    """
+    Find the first and last number (either in digit or word form) on each word, combine them into a single
+    number, and sum them all together.
+    """
+    calibration_value = 0
+    num_words = 0
     for word in words:
-        found_number_words = [word.find(w) for w in number_words]
-        while max(found_number_words) >= 0:
-            # Keep looking for substrings until none is found
-            first_found_number_word_num = found_number_words.index(min([f for f in found_number_words if f >= 0])) + 1
-            # To cover for the case "eighthree" = "83", where letter "T" is used twice, a possible
-            # solution is to keep the first and last letter during the replacement; e.g. "eight" = "e8t".
-            # This works on the assumption that only 1 letter can overlap between number words.
-            first_found_number_word_w = number_words[first_found_number_word_num - 1]
-            word = word.replace(
-                first_found_number_word_w,
-                f"{first_found_number_word_w[0]}{str(first_found_number_word_num)}{first_found_number_word_w[-1]}",
-            )
-            found_number_words = [word.find(w) for w in number_words]
-        new_words.append(word)
-
-    return find_calibration_value_numbers(new_words)
+        first_number, last_number = find_first_and_last_number(word)
+        calibration_value += first_number * 10 + last_number
+        num_words += 1
+
+    print(f"The calibration value of these {num_words} words is: {calibration_value}")
+    return calibration_value
+
+
+def find_calibration_value_vectorized(buffer: np.ndarray, part: int):
+    """
+    Same as the other solvers, but working on the raw bytes of the whole calibration document at once:
+    every digit (and, in part 2, every number word) is located with array comparisons, and the first and last one of
+    each line are found by binary searching the line boundaries among those positions.
+    Lines without any number do not contribute to the calibration value.
+    """
+    if len(buffer) == 0 or buffer[-1] != ord("\n"):
+        buffer = np.append(buffer, np.uint8(ord("\n")))
+
+    line_ends = np.flatnonzero(buffer == ord("\n"))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+    # Value of the number starting at each position of the buffer, or -1 if no number starts there
+    values = np.full(len(buffer), -1, dtype=np.int8)
+    digits_mask = (buffer >= ord("0")) & (buffer <= ord("9"))
+    values[digits_mask] = buffer[digits_mask] - ord("0")
+    if part == 2:
+        for number, number_word in enumerate(NUMBER_WORDS, start=1):
+            num_starts = len(buffer) - len(number_word) + 1
+            if num_starts <= 0:
+                continue
+            word_mask = np.ones(num_starts, dtype=bool)
+            for offset, character in enumerate(number_word.encode()):
+                word_mask &= buffer[offset:offset + num_starts] == character
+            values[:num_starts][word_mask] = number
+
+    number_positions = np.flatnonzero(values >= 0)
+    first_numbers = np.searchsorted(number_positions, line_starts, side="left")
+    last_numbers = np.searchsorted(number_positions, line_ends, side="left") - 1
+    lines_with_numbers = first_numbers <= last_numbers
+
+    first_values = values[number_positions[first_numbers[lines_with_numbers]]].astype(np.int64)
+    last_values = values[number_positions[last_numbers[lines_with_numbers]]].astype(np.int64)
+    calibration_value = int(np.sum(first_values * 10 + last_values))
+
+    print(f"The calibration value of these {len(line_ends)} words is: {calibration_value}")
+    return calibration_value
+
+
+def find_first_and_last_number(word: str, automaton: Optional[NumberAutomaton] = None) -> Tuple[int, int]:
+    """
+    Scans the word once, left to right, and returns the first and last number found on it (either in digit or word
+    form). Overlapping words such as "eighthree" are naturally handled by the automaton, since a match never
+    consumes the letters of the next one.
+    """
+    automaton = automaton or NUMBER_AUTOMATON
+    first_number, first_start = None, None
+    last_number, last_start = None, None
+
+    state = 0
+    for position, character in enumerate(word):
+        while state and character not in automaton.transitions[state]:
+            state = automaton.failures[state]
+        state = automaton.transitions[state].get(character, 0)
+
+        for value, length in automaton.outputs[state]:
+            start = position - length + 1
+            if first_start is None or start < first_start:
+                first_number, first_start = value, start
+            if last_start is None or start > last_start:
+                last_number, last_start = value, start
+
+    if first_number is None:
+        raise ValueError(f"No number found in word {word!r}.")
+
+    return first_number, last_number
 
 
 def read_words(file_path: str) -> List[str]:
@@ -75,10 +198,37 @@ def read_words(file_path: str) -> List[str]:
     return words
 
 
+def read_buffer(file_path: str) -> np.ndarray:
+    """Reads the whole file (or the standard input, if the path is "-") as a single array of bytes."""
+    if file_path == "-":
+        return np.frombuffer(sys.stdin.buffer.read(), dtype=np.uint8)
+
+    return np.fromfile(file_path, dtype=np.uint8)
+
+
+def iter_words(file_path: str) -> Iterator[str]:
+    """
+    Lazily yields the words of the file (or of the standard input, if the path is "-"), so that memory usage does
+    not depend on the size of the calibration document.
+    """
+    if file_path == "-":
+        for line in sys.stdin:
+            yield line.rstrip()
+        return
+
+    with open(file_path, "r") as f:
+        for line in f:
+            yield line.rstrip()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Read the input lazily; use '-' as input file to read from the standard input")
+    parser.add_argument("-v", "--vectorized", action="store_true",
+                        help="Process the whole input as a single NumPy array of bytes")
     args = parser.parse_args()
 
-    main(args.input_file, args.part)
+    main(args.input_file, args.part, args.stream, args.vectorized)
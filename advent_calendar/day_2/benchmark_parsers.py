@@ -0,0 +1,43 @@
+"""
+Compares the time needed to parse a game log with the original parser (one Game and Sample object per game and sample)
+and with the tokenizer that fills the columnar game table.
+The game log is randomly generated. To run the benchmark, execute:
+    python -m advent_calendar.day_2.benchmark_parsers -n 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import timeit
+
+from advent_calendar.day_2 import day2
+
+
+def main(num_games: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "games.txt")
+        write_random_games(input_file, num_games)
+
+        for parser_name, parser in [("read_input", day2.read_input), ("read_game_table", day2.read_game_table)]:
+            elapsed = min(timeit.repeat(lambda: parser(input_file), number=1, repeat=repeat))
+            print(f"{parser_name}: {elapsed:.3f}s for {num_games} games ({num_games / elapsed:,.0f} games/s)")
+
+
+def write_random_games(file_path: str, num_games: int):
+    colors = ["red", "green", "blue"]
+    with open(file_path, "w") as f:
+        for game_id in range(1, num_games + 1):
+            samples = []
+            for _ in range(random.randint(1, 6)):
+                sample_colors = random.sample(colors, random.randint(1, 3))
+                samples.append(", ".join(f"{random.randint(1, 20)} {color}" for color in sample_colors))
+            f.write(f"Game {game_id}: {'; '.join(samples)}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--num-games", type=int, default=100_000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.num_games, args.repeat)
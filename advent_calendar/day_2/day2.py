@@ -20,12 +20,23 @@ For each game, find the minimum set of cubes that must have been present. What i
 
 *ANSWER: 72596*
 """
+from __future__ import annotations
+
 import argparse
+import re
+import sys
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional, Union
 
 import numpy as np
 
+# A game ID, a count of cubes of a color (only the first letter is captured) or a separator between samples
+GAME_TOKEN_PATTERN = re.compile(r"Game (\d+)|(\d+) ([rgb])|;")
+COLOR_INDEXES = {"r": 0, "g": 1, "b": 2}
+COLOR_LOOKUP = np.zeros(256, dtype=np.int64)
+COLOR_LOOKUP[[ord(c) for c in COLOR_INDEXES]] = list(COLOR_INDEXES.values())
+MAX_INDEX_CELLS = 2 ** 24  # Largest array built by PossibleGamesIndex (128 MiB of int64)
+
 
 @dataclass
 class Sample:
@@ -59,8 +70,227 @@ class Game:
         return minimum_red, minimum_green, minimum_blue
 
 
-def main(input_file: str, bag_content: Optional[Tuple[int, int, int]], part: int):
-    games = read_input(input_file)
+@dataclass
+class GameTable:
+    """
+    Columnar alternative to a list of games: all samples are stored in a single (n_samples, 3) array of R, G and B
+    counts, and the samples of each game start at the position of the samples array given by its offset.
+    """
+    ids: np.ndarray
+    samples: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_games(cls, games: List[Game]) -> GameTable:
+        ids = np.array([g.id for g in games], dtype=np.int64)
+        samples = np.array([(s.red, s.green, s.blue) for g in games for s in g.samples], dtype=np.int64)
+        offsets = np.cumsum([0] + [len(g.samples) for g in games[:-1]], dtype=np.int64)
+        return cls(ids, samples.reshape(-1, 3), offsets)
+
+    def is_possible(self, red, green, blue) -> np.ndarray:
+        """Same as Game.is_possible, but for all the games at once."""
+        return np.all(self.find_minimum_sets() <= np.array([red, green, blue]), axis=1)
+
+    def find_minimum_sets(self) -> np.ndarray:
+        """Same as Game.find_minimum_set, but for all the games at once. Returns a (n_games, 3) array."""
+        if len(self.ids) == 0:
+            return np.zeros((0, 3), dtype=np.int64)
+        return np.maximum.reduceat(self.samples, self.offsets, axis=0)
+
+
+@dataclass
+class FenwickTree2D:
+    """
+    Fenwick tree over the (x, y) ranks of a known set of points, to which the points are added over time and whose
+    prefix sums are queried in between.
+    Each node of the outer tree (over x) only keeps an inner tree over the y ranks of the points it covers, instead of
+    every y rank, so it takes O(n log n) memory for n points. The inner trees are concatenated into a single array, and
+    the cells that each point goes through in the outer tree are found beforehand, so that batches of points (and
+    queries) are handled at once with NumPy. The sums are kept apart, so that the same tree can be filled many times.
+    """
+    num_ys: int
+    node_keys: np.ndarray  # Sorted x * num_ys + y of the points covered by each node of the outer tree
+    node_offsets: np.ndarray  # The inner tree of node x spans from node_offsets[x] to node_offsets[x + 1]
+    point_offsets: np.ndarray  # The cells of point i go from point_offsets[i] to point_offsets[i + 1]
+    cell_starts: np.ndarray  # For each cell of each point: start of its inner tree...
+    cell_sizes: np.ndarray  # ... size of its inner tree...
+    cell_idxs: np.ndarray  # ... and position of the point in its inner tree
+
+    @classmethod
+    def from_points(cls, xs: np.ndarray, ys: np.ndarray, num_xs: int, num_ys: int) -> FenwickTree2D:
+        # Walk the update path of the outer tree for all the points at once
+        num_points = len(xs)
+        point_idxs, keys = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        point_idx = np.arange(num_points)
+        while len(xs):
+            point_idxs.append(point_idx)
+            keys.append(xs * num_ys + ys)
+            xs = xs | (xs + 1)
+            in_tree = xs < num_xs
+            point_idx, xs, ys = point_idx[in_tree], xs[in_tree], ys[in_tree]
+
+        node_keys = np.unique(np.concatenate(keys))
+        node_offsets = np.searchsorted(node_keys, np.arange(num_xs + 1) * num_ys)
+
+        order = np.argsort(np.concatenate(point_idxs), kind="stable")
+        cell_keys = np.concatenate(keys)[order]
+        cell_starts = node_offsets[cell_keys // num_ys]
+        cell_sizes = node_offsets[cell_keys // num_ys + 1] - cell_starts
+        point_offsets = np.searchsorted(np.concatenate(point_idxs)[order], np.arange(num_points + 1))
+        cell_idxs = np.searchsorted(node_keys, cell_keys) - cell_starts
+        return cls(num_ys, node_keys, node_offsets, point_offsets, cell_starts, cell_sizes, cell_idxs)
+
+    def create_sums(self) -> np.ndarray:
+        return np.zeros(len(self.node_keys), dtype=np.int64)
+
+    def add(self, sums: np.ndarray, first_point: int, last_point: int, values: np.ndarray):
+        """Adds the values of the points from first_point (included) to last_point (excluded) to the sums."""
+        cells = slice(self.point_offsets[first_point], self.point_offsets[last_point])
+        starts, sizes, idxs = self.cell_starts[cells], self.cell_sizes[cells], self.cell_idxs[cells]
+        values = np.repeat(values, np.diff(self.point_offsets[first_point:last_point + 1]))
+        while len(idxs):
+            np.add.at(sums, starts + idxs, values)
+            idxs = idxs | (idxs + 1)
+            in_tree = idxs < sizes
+            starts, sizes, idxs, values = starts[in_tree], sizes[in_tree], idxs[in_tree], values[in_tree]
+
+    def prefix_sums(self, sums: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Returns the sum of the values of the points added so far with x and y ranks up to the given ones (both
+        included), for each of the given (x, y). Ranks of -1 are below every point.
+        """
+        num_queries = len(xs)
+        query_idxs, starts, idxs = [[np.zeros(0, dtype=np.int64)] for _ in range(3)]
+        query_idx = np.arange(num_queries)
+        in_tree = xs >= 0
+        query_idx, xs, ys = query_idx[in_tree], xs[in_tree], ys[in_tree]
+        while len(xs):
+            query_idxs.append(query_idx)
+            starts.append(self.node_offsets[xs])
+            idxs.append(np.searchsorted(self.node_keys, xs * self.num_ys + ys, side="right") - starts[-1] - 1)
+            xs = (xs & (xs + 1)) - 1
+            in_tree = xs >= 0
+            query_idx, xs, ys = query_idx[in_tree], xs[in_tree], ys[in_tree]
+
+        totals = np.zeros(num_queries, dtype=np.int64)
+        query_idx, starts, idxs = np.concatenate(query_idxs), np.concatenate(starts), np.concatenate(idxs)
+        while len(idxs):
+            in_tree = idxs >= 0
+            query_idx, starts, idxs = query_idx[in_tree], starts[in_tree], idxs[in_tree]
+            np.add.at(totals, query_idx, sums[starts + idxs])
+            idxs = (idxs & (idxs + 1)) - 1
+
+        return totals
+
+
+@dataclass
+class PossibleGamesIndex:
+    """
+    Answers "what is the sum of the IDs of the games that are possible with this bag content?" for many bag contents,
+    without parsing the games again.
+    A game is possible if its minimum set is dominated by the bag content, so the index is a 3D prefix sum of the game
+    IDs over the (compressed) minimum R, G and B values: each query is then 3 binary searches and a single lookup.
+    The size of the prefix sum is the product of the number of distinct minimum values of each colour, so it is only
+    built if it takes at most max_cells cells. Otherwise, the index is a FenwickTree2D over the minimum G and B values,
+    whose size grows with the number of games instead: bag contents are answered offline, sorted by R, adding the games
+    whose minimum R fits in each of them to the tree before querying it. Each bag content then takes O(log^2 n), on top
+    of the O(n log^2 n) additions shared by the whole batch.
+    """
+    ids: np.ndarray  # Sorted by the minimum red of each game
+    minimum_sets: np.ndarray
+    reds: np.ndarray
+    greens: np.ndarray
+    blues: np.ndarray
+    id_sums: Optional[np.ndarray]  # id_sums[r, g, b] = sum of IDs of games with less than r, g and b distinct minimums
+    green_blue_tree: Optional[FenwickTree2D] = None
+
+    @classmethod
+    def from_games(cls, games: Union[List[Game], GameTable], max_cells: int = MAX_INDEX_CELLS) -> PossibleGamesIndex:
+        if isinstance(games, GameTable):
+            return cls.from_minimum_sets(games.ids, games.find_minimum_sets(), max_cells)
+
+        ids = np.array([g.id for g in games], dtype=np.int64)
+        minimum_sets = np.array([g.find_minimum_set() for g in games], dtype=np.int64).reshape(-1, 3)
+        return cls.from_minimum_sets(ids, minimum_sets, max_cells)
+
+    @classmethod
+    def from_minimum_sets(cls,
+                          ids: np.ndarray,
+                          minimum_sets: np.ndarray,
+                          max_cells: int = MAX_INDEX_CELLS) -> PossibleGamesIndex:
+        order = np.argsort(minimum_sets[:, 0], kind="stable")
+        ids, minimum_sets = ids[order], minimum_sets[order]
+        reds, red_idx = np.unique(minimum_sets[:, 0], return_inverse=True)
+        greens, green_idx = np.unique(minimum_sets[:, 1], return_inverse=True)
+        blues, blue_idx = np.unique(minimum_sets[:, 2], return_inverse=True)
+
+        shape = (len(reds) + 1, len(greens) + 1, len(blues) + 1)
+        if shape[0] * shape[1] * shape[2] > max_cells:
+            green_blue_tree = FenwickTree2D.from_points(green_idx.ravel(), blue_idx.ravel(), len(greens), len(blues))
+            return cls(ids, minimum_sets, reds, greens, blues, None, green_blue_tree)
+
+        # Index 0 of each axis is left empty, so that a value smaller than all minimums maps to a sum of 0
+        id_sums = np.zeros(shape, dtype=np.int64)
+        np.add.at(id_sums, (red_idx.ravel() + 1, green_idx.ravel() + 1, blue_idx.ravel() + 1), ids)
+        for axis in range(3):
+            np.cumsum(id_sums, axis=axis, out=id_sums)
+
+        return cls(ids, minimum_sets, reds, greens, blues, id_sums)
+
+    def query(self, bag_contents: np.ndarray) -> np.ndarray:
+        """
+        Returns the sum of the IDs of the possible games for each (R, G, B) bag content of a (n_queries, 3) array.
+        """
+        bag_contents = np.asarray(bag_contents, dtype=np.int64).reshape(-1, 3)
+        if self.id_sums is None:
+            return self._query_green_blue_tree(bag_contents)
+
+        red_idx = np.searchsorted(self.reds, bag_contents[:, 0], side="right")
+        green_idx = np.searchsorted(self.greens, bag_contents[:, 1], side="right")
+        blue_idx = np.searchsorted(self.blues, bag_contents[:, 2], side="right")
+        return self.id_sums[red_idx, green_idx, blue_idx]
+
+    def _query_green_blue_tree(self, bag_contents: np.ndarray) -> np.ndarray:
+        """
+        Sweeps over the bag contents sorted by red. Before each group of bag contents that the same games fit in by
+        their minimum red, the games not added yet are added to the tree.
+        """
+        order = np.argsort(bag_contents[:, 0], kind="stable")
+        num_games = np.searchsorted(self.minimum_sets[:, 0], bag_contents[order, 0], side="right")
+        # Ranks of the highest minimum G and B that fit in each bag content (-1 if none does)
+        green_idx = np.searchsorted(self.greens, bag_contents[order, 1], side="right") - 1
+        blue_idx = np.searchsorted(self.blues, bag_contents[order, 2], side="right") - 1
+
+        sums = self.green_blue_tree.create_sums()
+        id_sums = np.zeros(len(bag_contents), dtype=np.int64)
+        group_starts = np.flatnonzero(np.diff(num_games, prepend=-1))
+        num_added_games = 0
+        for group_start, group_end in zip(group_starts, np.append(group_starts[1:], len(order))):
+            group_num_games = num_games[group_start]
+            self.green_blue_tree.add(sums, num_added_games, group_num_games, self.ids[num_added_games:group_num_games])
+            num_added_games = group_num_games
+            id_sums[order[group_start:group_end]] = self.green_blue_tree.prefix_sums(
+                sums, green_idx[group_start:group_end], blue_idx[group_start:group_end]
+            )
+
+        return id_sums
+
+
+def main(input_file: str,
+         bag_content: Optional[Tuple[int, int, int]],
+         part: int,
+         columnar: bool = False,
+         stream: bool = False):
+    if stream:
+        if part == 1 and not bag_content:
+            raise ValueError("You must define a bag content when solving part 1.")
+        sum_possible_games_ids, sum_minimum_sets = find_possible_games_and_minimum_sets(
+            iter_lines(input_file), bag_content
+        )
+        print(f"The possible games sum {sum_possible_games_ids}. The minimum sets sum {sum_minimum_sets}.")
+        return sum_possible_games_ids if part == 1 else sum_minimum_sets
+
+    games = read_game_table(input_file) if columnar else read_input(input_file)
 
     if part == 1:
         return find_possible_games(games, bag_content)
@@ -89,34 +319,139 @@ def read_input(file_path: str) -> List[Game]:
     return games
 
 
-def find_possible_games(games: List[Game], bag_content: Tuple[int, int, int]):
+def read_game_table(file_path: str) -> GameTable:
+    return tokenize_game_table(np.fromfile(file_path, dtype=np.uint8))
+
+
+def tokenize_games(lines: Iterable[str]) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Walks each line of a game log once, yielding a (game ID, sample index, color index, count) tuple for every count
+    of cubes shown. Color indexes are 0 for red, 1 for green and 2 for blue.
+    """
+    for line in lines:
+        game_id = None
+        sample_idx = 0
+        for token_game_id, count, color in GAME_TOKEN_PATTERN.findall(line):
+            if token_game_id:
+                game_id = int(token_game_id)
+            elif count:
+                yield game_id, sample_idx, COLOR_INDEXES[color], int(count)
+            else:
+                sample_idx += 1
+
+
+def tokenize_game_table(buffer: np.ndarray) -> GameTable:
+    """
+    Builds the game table straight from the bytes of a game log, without any per-line or per-token Python work:
+    every number is located as a run of digits; a number followed by ":" is a game ID and any other number is a count
+    of cubes, whose color is the letter after the following space. Every ":" and ";" starts a new sample.
+    """
+    if len(buffer) == 0 or buffer[-1] != ord("\n"):
+        buffer = np.append(buffer, np.uint8(ord("\n")))
+
+    digits_mask = (buffer >= ord("0")) & (buffer <= ord("9"))
+    previous_is_digit = np.concatenate(([False], digits_mask[:-1]))
+    next_is_digit = np.concatenate((digits_mask[1:], [False]))
+    number_starts = np.flatnonzero(digits_mask & ~previous_is_digit)
+    number_ends = np.flatnonzero(digits_mask & ~next_is_digit) + 1  # Excluded
+
+    # The value of each number is the sum of its digits, each one multiplied by its power of 10
+    digit_positions = np.flatnonzero(digits_mask)
+    number_lengths = number_ends - number_starts
+    digit_number_ends = np.repeat(number_ends, number_lengths)
+    digit_values = (buffer[digit_positions] - ord("0")).astype(np.int64)
+    digit_values *= 10 ** (digit_number_ends - 1 - digit_positions)
+    number_values = np.add.reduceat(digit_values, np.cumsum(number_lengths) - number_lengths) \
+        if len(digit_values) else np.zeros(0, dtype=np.int64)
+
+    is_game_id = buffer[number_ends] == ord(":")
+    count_starts = number_starts[~is_game_id]
+    count_colors = COLOR_LOOKUP[buffer[number_ends[~is_game_id] + 1]]
+
+    separators = np.flatnonzero((buffer == ord(":")) | (buffer == ord(";")))
+    samples = np.zeros((len(separators), 3), dtype=np.int64)
+    samples[np.searchsorted(separators, count_starts) - 1, count_colors] = number_values[~is_game_id]
+
+    return GameTable(
+        number_values[is_game_id],
+        samples,
+        np.flatnonzero(buffer[separators] == ord(":")),
+    )
+
+
+def find_possible_games(games: Union[List[Game], GameTable], bag_content: Tuple[int, int, int]):
     """
     Computes the sum of the IDs of all the games that are possible to play, given a certain amount of cubes.
     """
     if not bag_content:
         raise ValueError("You must define a bag content when solving part 1.")
 
-    possible_games = [game for game in games if game.is_possible(*bag_content)]
-    possible_games_ids = [g.id for g in possible_games]
+    if isinstance(games, GameTable):
+        possible_games_ids = games.ids[games.is_possible(*bag_content)].tolist()
+    else:
+        possible_games = [game for game in games if game.is_possible(*bag_content)]
+        possible_games_ids = [g.id for g in possible_games]
     sum_possible_games_ids = sum(possible_games_ids)
 
     print(f"The possible games are {possible_games_ids}, which sum {sum_possible_games_ids}.")
     return sum_possible_games_ids
 
 
-def find_minimum_sets(games: List[Game]):
+def find_minimum_sets(games: Union[List[Game], GameTable]):
     """
     Computes the sum of the power of all the sets that account for the minimum amount of necessary cubes to make
     each game possible.
     """
-    minimum_sets = [np.prod(list(g.find_minimum_set())) for g in games]
+    if isinstance(games, GameTable):
+        minimum_sets = np.prod(games.find_minimum_sets(), axis=1).tolist()
+    else:
+        minimum_sets = [np.prod(list(g.find_minimum_set())) for g in games]
     sum_minimum_sets = sum(minimum_sets)
 
     print(f"The minimum sets for each game are {minimum_sets}, which sum {sum_minimum_sets}.")
     return sum_minimum_sets
 
 
+def find_possible_games_and_minimum_sets(lines: Iterable[str],
+                                         bag_content: Optional[Tuple[int, int, int]]) -> Tuple[Optional[int], int]:
+    """
+    Solves both parts in a single pass over the game log, keeping only the minimum set of the current game in memory.
+    Returns the sum of the IDs of the possible games (None if there is no bag content) and the sum of the power of the
+    minimum sets.
+    """
+    sum_possible_games_ids = 0 if bag_content else None
+    sum_minimum_sets = 0
+    for line in lines:
+        game_id = None
+        minimum_set = [0, 0, 0]
+        for game_id, _, color_idx, count in tokenize_games((line,)):
+            if count > minimum_set[color_idx]:
+                minimum_set[color_idx] = count
+        if game_id is None:
+            continue
+
+        if bag_content and all(m <= b for m, b in zip(minimum_set, bag_content)):
+            sum_possible_games_ids += game_id
+        sum_minimum_sets += minimum_set[0] * minimum_set[1] * minimum_set[2]
+
+    return sum_possible_games_ids, sum_minimum_sets
+
+
+def iter_lines(file_path: str) -> Iterator[str]:
+    """Lazily yields the lines of the file, or of the standard input if the path is "-"."""
+    if file_path == "-":
+        yield from sys.stdin
+        return
+
+    with open(file_path, "r") as f:
+        yield from f
+
+
 def _parse_sample(sample_text: str) -> Sample:
+    return Sample(*_parse_sample_counts(sample_text))
+
+
+def _parse_sample_counts(sample_text: str) -> Tuple[int, int, int]:
     samples = sample_text.split(", ")
     sample_red, sample_green, sample_blue = 0, 0, 0
     for sample in samples:
@@ -127,7 +462,7 @@ def _parse_sample(sample_text: str) -> Sample:
             sample_green = sample_amount
         else:
             sample_blue = sample_amount
-    return Sample(sample_red, sample_green, sample_blue)
+    return sample_red, sample_green, sample_blue
 
 
 if __name__ == "__main__":
@@ -135,6 +470,10 @@ if __name__ == "__main__":
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-b", "--bag-content", type=int, nargs=3)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-c", "--columnar", action="store_true",
+                        help="Store all the games in a single array instead of one object per game and sample")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Solve both parts in a single pass; use '-' as input file to read from the standard input")
     args = parser.parse_args()
 
-    main(args.input_file, args.bag_content, args.part)
+    main(args.input_file, args.bag_content, args.part, args.columnar, args.stream)
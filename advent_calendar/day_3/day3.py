@@ -14,23 +14,183 @@ What is the sum of all of the gear ratios in your engine schematic?
 
 *ANSWER: 84266818*
 """
+from __future__ import annotations
+
 import argparse
-from typing import List, Tuple, Dict
+import bisect
+import math
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
 
+NUMBER_PATTERN = re.compile(r"\d+")
+GEAR_PATTERN = re.compile(r"\*")
+
+
+@dataclass
+class SchematicIndex:
+    """
+    Adjacency between the numbers and the symbols of a schematic, in both directions. Numbers are stored as returned
+    by get_all_numbers, and are referred to by their index in that list.
+    """
+    numbers: List[Tuple[int, Tuple[int, int]]]
+    number_symbols: List[List[Tuple[int, int]]]  # Position of the symbols adjacent to each number
+    symbols: Dict[Tuple[int, int], str]  # Only the symbols adjacent to at least one number are kept
+    symbol_numbers: Dict[Tuple[int, int], List[int]]  # Indexes of the numbers adjacent to each symbol
+
+    def get_part_numbers(self) -> List[int]:
+        """Returns all numbers adjacent to a symbol, sorted."""
+        return sorted([number for (number, _), symbols in zip(self.numbers, self.number_symbols) if symbols])
+
+    def get_gears(self, num_numbers: int = 2) -> Dict[Tuple[int, int], List[int]]:
+        """Returns the numbers adjacent to each "*" symbol that is adjacent to exactly `num_numbers` numbers."""
+        return {
+            position: [self.numbers[number_idx][0] for number_idx in number_idxs]
+            for position, number_idxs in self.symbol_numbers.items()
+            if self.symbols[position] == "*" and len(number_idxs) == num_numbers
+        }
+
+
+class EditableSchematic:
+    """
+    Schematic whose cells can be edited one by one, keeping the sum of the part numbers and the sum of the gear ratios
+    up to date. An edit only revisits the numbers around the edited cell and the gears around those numbers.
+    """
+
+    def __init__(self, schematic: List[str]):
+        self.grid = [list(row) for row in schematic]
+        self.numbers: Dict[int, Tuple[int, int, int, int]] = {}  # (row, start, end, value) of each number ID
+        self.number_at: Dict[Tuple[int, int], int] = {}  # ID of the number on each cell with a digit
+        self.part_numbers = set()  # IDs of the numbers adjacent to a symbol
+        self.gear_ratios: Dict[Tuple[int, int], int] = {}  # Ratio of each gear
+        self.part_numbers_sum = 0
+        self.gear_ratios_sum = 0
+        self._next_number_id = 0
+
+        for row_idx, row in enumerate(schematic):
+            for match in NUMBER_PATTERN.finditer(row):
+                self._add_number(row_idx, match.start(), match.end())
+        for number_id in self.numbers:
+            self._refresh_part_number(number_id)
+        for row_idx, row in enumerate(schematic):
+            for match in GEAR_PATTERN.finditer(row):
+                self._refresh_gear((row_idx, match.start()))
+
+    def set_cell(self, row_idx: int, col_idx: int, character: str):
+        if self.grid[row_idx][col_idx] == character:
+            return
+
+        # Numbers touching the edited cell on its row may be split, shortened, extended or merged: re-read them
+        edited_numbers = {self.number_at[cell] for cell in self._row_cells(row_idx, col_idx - 1, col_idx + 2)
+                          if cell in self.number_at}
+        start = min([self.numbers[n][1] for n in edited_numbers] + [col_idx])
+        end = max([self.numbers[n][2] for n in edited_numbers] + [col_idx + 1])
+        gears_to_refresh = {(row_idx, col_idx)}
+        for number_id in edited_numbers:
+            gears_to_refresh.update(self._gears_around(number_id))
+            self._remove_number(number_id)
+
+        self.grid[row_idx][col_idx] = character
+        for match in NUMBER_PATTERN.finditer("".join(self.grid[row_idx][start:end])):
+            number_id = self._add_number(row_idx, start + match.start(), start + match.end())
+            gears_to_refresh.update(self._gears_around(number_id))
+
+        # Numbers around the edited cell may have gained or lost a symbol
+        for cell in self._neighbor_cells(row_idx, col_idx, col_idx + 1):
+            if cell in self.number_at:
+                self._refresh_part_number(self.number_at[cell])
+        for gear in gears_to_refresh:
+            self._refresh_gear(gear)
+
+    def to_schematic(self) -> List[str]:
+        return ["".join(row) for row in self.grid]
+
+    def _add_number(self, row_idx: int, start: int, end: int) -> int:
+        number_id = self._next_number_id
+        self._next_number_id += 1
+        self.numbers[number_id] = (row_idx, start, end, int("".join(self.grid[row_idx][start:end])))
+        for cell in self._row_cells(row_idx, start, end):
+            self.number_at[cell] = number_id
+        return number_id
+
+    def _remove_number(self, number_id: int):
+        row_idx, start, end, value = self.numbers.pop(number_id)
+        for cell in self._row_cells(row_idx, start, end):
+            del self.number_at[cell]
+        if number_id in self.part_numbers:
+            self.part_numbers.remove(number_id)
+            self.part_numbers_sum -= value
+
+    def _refresh_part_number(self, number_id: int):
+        row_idx, start, end, value = self.numbers[number_id]
+        is_part_number = any([_is_symbol(self.grid[r][c]) for r, c in self._neighbor_cells(row_idx, start, end)])
+        if is_part_number and number_id not in self.part_numbers:
+            self.part_numbers.add(number_id)
+            self.part_numbers_sum += value
+        elif not is_part_number and number_id in self.part_numbers:
+            self.part_numbers.remove(number_id)
+            self.part_numbers_sum -= value
+
+    def _refresh_gear(self, cell: Tuple[int, int]):
+        self.gear_ratios_sum -= self.gear_ratios.pop(cell, 0)
+        if self.grid[cell[0]][cell[1]] != "*":
+            return
+
+        number_ids = {self.number_at[c] for c in self._neighbor_cells(cell[0], cell[1], cell[1] + 1)
+                      if c in self.number_at}
+        if len(number_ids) == 2:
+            first_number_id, second_number_id = number_ids
+            gear_ratio = self.numbers[first_number_id][3] * self.numbers[second_number_id][3]
+            self.gear_ratios[cell] = gear_ratio
+            self.gear_ratios_sum += gear_ratio
+
+    def _gears_around(self, number_id: int) -> List[Tuple[int, int]]:
+        row_idx, start, end, _ = self.numbers[number_id]
+        return [(r, c) for r, c in self._neighbor_cells(row_idx, start, end) if self.grid[r][c] == "*"]
+
+    def _row_cells(self, row_idx: int, start: int, end: int) -> List[Tuple[int, int]]:
+        """Cells of the row between the start (included) and the end (excluded) columns, within the schematic."""
+        return [(row_idx, c) for c in range(max(start, 0), min(end, len(self.grid[row_idx])))]
+
+    def _neighbor_cells(self, row_idx: int, start: int, end: int) -> List[Tuple[int, int]]:
+        """Cells of the span between the start and end columns of the row, and of the cells surrounding it."""
+        return [cell for r in range(max(row_idx - 1, 0), min(row_idx + 2, len(self.grid)))
+                for cell in self._row_cells(r, start - 1, end + 1)]
+
+
+def main(input_file: str,
+         part: int,
+         vectorized: bool = False,
+         stream: bool = False,
+         workers: Optional[int] = None):
+    if stream:
+        return solve_stream(iter_schematic(input_file), part)
 
-def main(input_file: str, part: int):
     schematic = read_schematic(input_file)
 
     if part == 1:
-        adjacent_numbers = get_numbers_adjacent_to_symbol(schematic)
+        if vectorized:
+            adjacent_numbers = get_numbers_adjacent_to_symbol_vectorized(schematic)
+        elif workers:
+            adjacent_numbers = get_numbers_adjacent_to_symbol_parallel(schematic, workers)
+        else:
+            adjacent_numbers = build_schematic_index(schematic).get_part_numbers()
         adjacent_numbers_sum = sum(adjacent_numbers)
         print(f"Found {len(adjacent_numbers)} numbers adjacent to a symbol: {adjacent_numbers}. "
               f"Their sum is {adjacent_numbers_sum}")
         return adjacent_numbers_sum
     else:
-        gears = get_numbers_adjacent_to_gear(schematic)
+        if vectorized:
+            raise ValueError("The vectorized engine can only solve part 1.")
+        if workers:
+            gears = get_numbers_adjacent_to_gear_parallel(schematic, workers)
+        else:
+            gears = build_schematic_index(schematic).get_gears()
         gear_ratios = [np.prod(numbers) for numbers in gears.values()]
         gear_ratios_sum = sum(gear_ratios)
         print(f"Found {len(gears)} gears: {gears}. "
@@ -38,38 +198,153 @@ def main(input_file: str, part: int):
         return gear_ratios_sum
 
 
+def solve_stream(rows: Iterable[str], part: int) -> int:
+    """
+    Same as main, but reading the schematic row by row. Only the sums are computed, since the whole list of numbers or
+    gears could not fit in memory.
+    """
+    total = 0
+    num_found = 0
+    for _, part_numbers, gears in stream_schematic(rows):
+        if part == 1:
+            total += sum(part_numbers)
+            num_found += len(part_numbers)
+        else:
+            total += sum([numbers[0] * numbers[1] for numbers in gears.values()])
+            num_found += len(gears)
+
+    if part == 1:
+        print(f"Found {num_found} numbers adjacent to a symbol. Their sum is {total}")
+    else:
+        print(f"Found {num_found} gears. The sum of all their gear ratios is: {total}")
+    return total
+
+
+def stream_schematic(rows: Iterable[str]) -> Iterator[Tuple[int, List[int], Dict[Tuple[int, int], List[int]]]]:
+    """
+    Reads the schematic row by row, keeping only a window with the previous, current and next rows. As soon as the row
+    after a given one has been read, nothing else can be adjacent to it, so its index, its part numbers and its gears
+    are yielded and the previous row falls out of the window.
+    """
+    previous_row, current_row = None, None
+    row_idx = -1
+    for row_idx, row in enumerate(rows):
+        next_row = _parse_row(row.rstrip())
+        if current_row is not None:
+            yield row_idx - 1, *_find_row_parts_and_gears(row_idx - 1, previous_row, current_row, next_row)
+        previous_row, current_row = current_row, next_row
+
+    if current_row is not None:
+        yield row_idx, *_find_row_parts_and_gears(row_idx, previous_row, current_row, None)
+
+
+def _parse_row(row: str) -> Tuple[str, List[Tuple[int, int, int]], List[int]]:
+    """Returns the row, along with the (value, start, end) of each of its numbers and the list of their starts."""
+    numbers = [(int(match.group()), match.start(), match.end()) for match in NUMBER_PATTERN.finditer(row)]
+    return row, numbers, [start for _, start, _ in numbers]
+
+
+def _find_row_parts_and_gears(row_idx: int, *window: Optional[Tuple[str, List[Tuple[int, int, int]], List[int]]]):
+    """
+    Finds the part numbers and the gears of the middle row of the window, which contains the previous, current and
+    next rows (None if they do not exist).
+    """
+    neighbor_rows = [r for r in window if r is not None]
+    current_row, current_numbers, _ = window[1]
+
+    part_numbers = []
+    for number, start, end in current_numbers:
+        for row, _, _ in neighbor_rows:
+            if any([_is_symbol(character) for character in row[max(start - 1, 0):end + 1]]):
+                part_numbers.append(number)
+                break
+
+    gears = {}
+    for match in GEAR_PATTERN.finditer(current_row):
+        col_idx = match.start()
+        numbers = []
+        for _, row_numbers, row_starts in neighbor_rows:
+            # Numbers are sorted and do not overlap, so only the last ones starting up to the next column can touch it
+            adjacent_numbers = []
+            number_idx = bisect.bisect_right(row_starts, col_idx + 1) - 1
+            while number_idx >= 0 and row_numbers[number_idx][2] >= col_idx:
+                adjacent_numbers.append(row_numbers[number_idx][0])
+                number_idx -= 1
+            numbers.extend(reversed(adjacent_numbers))
+        if len(numbers) == 2:
+            gears[(row_idx, col_idx)] = numbers
+
+    return part_numbers, gears
+
+
+def _is_symbol(character: str) -> bool:
+    return not character.isalnum() and character != "."
+
+
 def get_numbers_adjacent_to_symbol(schematic: List[str]):
     """
     Finds all numbers that are adjacent to a symbol.
     """
-    adjacent_numbers = []
-    all_numbers = get_all_numbers(schematic)
-
-    min_row, max_row, min_col, max_col = 0, len(schematic) - 1, 0, len(schematic[0]) - 1
-    for number, number_pos in all_numbers:
-        row_idx = number_pos[0]
-        col_idx = number_pos[1]
-        positions_to_check = []
-
-        num_rows_to_check = 3  # Previous, current, next
-        num_cols_to_check = len(str(number)) + 2  # Previous + N current + next
-        for r in range(num_rows_to_check):
-            for c in range(num_cols_to_check):
-                positions_to_check.append(
-                    (
-                        min(max(row_idx - 1 + r, min_row), max_row),
-                        min(max(col_idx - 1 + c, min_col), max_col),
-                    )
-                )
-        positions_to_check = list(set(positions_to_check))
-
-        for pos in positions_to_check:
-            character = schematic[pos[0]][pos[1]]
-            if not character.isalnum() and character != ".":
-                adjacent_numbers.append(number)
-                break
+    return build_schematic_index(schematic).get_part_numbers()
+
+
+def get_numbers_adjacent_to_symbol_vectorized(schematic: List[str]) -> List[int]:
+    """
+    Same as get_numbers_adjacent_to_symbol, but working on the whole schematic at once as a NumPy array of bytes:
+    the mask of symbols is dilated once with the 3x3 neighborhood of each cell, and a number is adjacent to a symbol
+    if any of its digits falls within the dilated mask.
+    """
+    grid = _to_grid(schematic)
+    height, width = grid.shape
+
+    is_alnum = ((grid >= ord("0")) & (grid <= ord("9"))) | (((grid | 0x20) >= ord("a")) & ((grid | 0x20) <= ord("z")))
+    symbols_mask = ~is_alnum & (grid != ord("."))
+
+    padded_symbols_mask = np.pad(symbols_mask, 1)
+    dilated_symbols_mask = np.zeros_like(symbols_mask)
+    for row_offset in range(3):
+        for col_offset in range(3):
+            dilated_symbols_mask |= padded_symbols_mask[row_offset:row_offset + height, col_offset:col_offset + width]
+
+    digits = grid.ravel()
+    digit_positions, number_offsets, number_values = _find_number_spans(digits)
+    if len(number_values) == 0:
+        return []
+    adjacent = np.logical_or.reduceat(dilated_symbols_mask.ravel()[digit_positions], number_offsets)
 
-    return sorted(adjacent_numbers)
+    return sorted(number_values[adjacent].tolist())
+
+
+def _to_grid(schematic: List[str]) -> np.ndarray:
+    """
+    Converts the schematic into a 2D array of bytes. Rows are padded with "." to the same length, plus an extra "."
+    column at the end so that numbers never continue from one row to the next one once the grid is flattened.
+    """
+    width = max([len(row) for row in schematic], default=0) + 1
+    buffer = "".join([row.ljust(width, ".") for row in schematic]).encode("ascii")
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(len(schematic), width)
+
+
+def _find_number_spans(characters: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds all the runs of digits in a 1D array of bytes. Returns the positions of every digit, the index (among those
+    positions) where each number starts, and the value of each number.
+    """
+    digits_mask = (characters >= ord("0")) & (characters <= ord("9"))
+    digit_positions = np.flatnonzero(digits_mask)
+    if len(digit_positions) == 0:
+        return digit_positions, digit_positions, np.zeros(0, dtype=np.int64)
+
+    # A new number starts on every digit that is not right after the previous digit
+    number_offsets = np.flatnonzero(np.diff(digit_positions, prepend=-2) != 1)
+    number_lengths = np.diff(number_offsets, append=len(digit_positions))
+    number_ends = np.repeat(digit_positions[number_offsets] + number_lengths, number_lengths)
+
+    digit_values = (characters[digit_positions] - ord("0")).astype(np.int64)
+    digit_values *= 10 ** (number_ends - 1 - digit_positions)
+    number_values = np.add.reduceat(digit_values, number_offsets)
+
+    return digit_positions, number_offsets, number_values
 
 
 def get_all_numbers(schematic: List[str]) -> List[Tuple[int, Tuple[int, int]]]:
@@ -96,38 +371,79 @@ def get_all_numbers(schematic: List[str]) -> List[Tuple[int, Tuple[int, int]]]:
 
 
 def get_numbers_adjacent_to_gear(schematic: List[str]) -> Dict[Tuple[int, int], List[int]]:
-    gears_found = {}  # Keys are the position of a gear; values are the list of numbers touching the gear
-    all_numbers = get_all_numbers(schematic)
-
-    min_row, max_row, min_col, max_col = 0, len(schematic) - 1, 0, len(schematic[0]) - 1
-    for number, number_pos in all_numbers:
-        row_idx = number_pos[0]
-        col_idx = number_pos[1]
-        positions_to_check = []
-
-        num_rows_to_check = 3  # Previous, current, next
-        num_cols_to_check = len(str(number)) + 2  # Previous + N current + next
-        for r in range(num_rows_to_check):
-            for c in range(num_cols_to_check):
-                positions_to_check.append(
-                    (
-                        min(max(row_idx - 1 + r, min_row), max_row),
-                        min(max(col_idx - 1 + c, min_col), max_col),
-                    )
-                )
-        positions_to_check = list(set(positions_to_check))
-
-        for pos in positions_to_check:
-            character = schematic[pos[0]][pos[1]]
-            character_position = (pos[0], pos[1])
-            if character == "*":
-                if character_position not in gears_found:
-                    gears_found[character_position] = []
-                gears_found[character_position].append(number)
-
-    # Gears are gears only if they are adjacent to exactly 2 numbers
-    gears_found = {k: v for k, v in gears_found.items() if len(v) == 2}
-    return gears_found
+    return build_schematic_index(schematic).get_gears()
+
+
+def get_numbers_adjacent_to_symbol_parallel(schematic: List[str], max_workers: Optional[int] = None) -> List[int]:
+    """Same as get_numbers_adjacent_to_symbol, but splitting the schematic in bands processed in parallel."""
+    return sorted([number for part_numbers, _ in _process_bands(schematic, max_workers) for number in part_numbers])
+
+
+def get_numbers_adjacent_to_gear_parallel(schematic: List[str],
+                                          max_workers: Optional[int] = None) -> Dict[Tuple[int, int], List[int]]:
+    """Same as get_numbers_adjacent_to_gear, but splitting the schematic in bands processed in parallel."""
+    return {
+        position: numbers
+        for _, gears in _process_bands(schematic, max_workers)
+        for position, numbers in gears.items()
+    }
+
+
+def _process_bands(schematic: List[str], max_workers: Optional[int] = None):
+    """
+    Splits the schematic in bands of consecutive rows, and finds the part numbers and gears of each band in a separate
+    process. Every band is sent along with the row above and the row below it (its halo), so that everything adjacent
+    to its rows is known. Numbers never span more than one row, and gears are only reported by the band that owns their
+    row, so the results of the bands can be simply put together.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    band_size = max(math.ceil(len(schematic) / (max_workers * 4)), 1)
+
+    bands = []
+    for first_row_idx in range(0, len(schematic), band_size):
+        halo_start = max(first_row_idx - 1, 0)
+        halo_end = min(first_row_idx + band_size + 1, len(schematic))
+        bands.append((schematic[halo_start:halo_end], halo_start, first_row_idx, band_size))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_process_band, *zip(*bands)))
+
+
+def _process_band(rows: List[str], halo_start: int, first_row_idx: int, band_size: int):
+    """Finds the part numbers and the gears within the rows of a band, given the rows of the band and its halo."""
+    index = build_schematic_index(rows)
+
+    owned_rows = range(first_row_idx - halo_start, first_row_idx - halo_start + band_size)
+    part_numbers = [number for (number, (row_idx, _)), symbols in zip(index.numbers, index.number_symbols)
+                    if symbols and row_idx in owned_rows]
+    gears = {(row_idx + halo_start, col_idx): numbers for (row_idx, col_idx), numbers in index.get_gears().items()
+             if row_idx in owned_rows}
+
+    return part_numbers, gears
+
+
+def build_schematic_index(schematic: List[str]) -> SchematicIndex:
+    """
+    Walks the neighborhood of every number of the schematic once, recording which symbols it touches.
+    """
+    numbers = get_all_numbers(schematic)
+    symbols = {}
+    number_symbols = []
+    symbol_numbers = {}
+
+    for number_idx, (number, (row_idx, col_idx)) in enumerate(numbers):
+        adjacent_symbols = []
+        for r in range(max(row_idx - 1, 0), min(row_idx + 2, len(schematic))):
+            row = schematic[r]
+            for c in range(max(col_idx - 1, 0), min(col_idx + len(str(number)) + 1, len(row))):
+                character = row[c]
+                if not character.isalnum() and character != ".":
+                    symbols[(r, c)] = character
+                    adjacent_symbols.append((r, c))
+                    symbol_numbers.setdefault((r, c), []).append(number_idx)
+        number_symbols.append(adjacent_symbols)
+
+    return SchematicIndex(numbers, number_symbols, symbols, symbol_numbers)
 
 
 def read_schematic(file_path: str) -> List[str]:
@@ -137,10 +453,26 @@ def read_schematic(file_path: str) -> List[str]:
     return schematic
 
 
+def iter_schematic(file_path: str) -> Iterator[str]:
+    """Lazily yields the rows of the file, or of the standard input if the path is "-"."""
+    if file_path == "-":
+        yield from sys.stdin
+        return
+
+    with open(file_path, "r") as f:
+        yield from f
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-v", "--vectorized", action="store_true",
+                        help="Process the whole schematic as a single NumPy array (only for part 1)")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Read the schematic row by row; use '-' as input file to read from the standard input")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="Split the schematic in bands processed by this amount of processes")
     args = parser.parse_args()
 
-    main(args.input_file, args.part)
+    main(args.input_file, args.part, args.vectorized, args.stream, args.workers)
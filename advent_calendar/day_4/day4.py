@@ -19,10 +19,22 @@ scratchcards, how many total scratchcards do you end up with?
 
 *ANSWER: 5571760*
 """
+from __future__ import annotations
+
 import argparse
 import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Set
+from itertools import chain, repeat
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+# Number of bits set on each possible byte
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
 
 
 @dataclass
@@ -39,63 +51,256 @@ class Card:
         if num_matches == 0:
             return 0
         else:
-            return int(math.pow(2, num_matches - 1))
+            return 1 << (num_matches - 1)
+
+
+@dataclass
+class CardStore:
+    """
+    Compact alternative to a list of cards: the winning numbers and our numbers of each card are stored as a bitmask,
+    split in as many 64-bit words as needed to fit all the distinct numbers. Each of them is thus a (n_cards, n_words)
+    array. Numbers are replaced by their rank among all the distinct numbers, so that a single high number does not make
+    every card wider.
+    """
+    ids: np.ndarray
+    winning_numbers: np.ndarray
+    our_numbers: np.ndarray
+
+    @classmethod
+    def from_cards(cls, cards: List[Card]) -> CardStore:
+        return cls.from_numbers(
+            [c.id for c in cards],
+            [list(c.winning_numbers) for c in cards],
+            [list(c.our_numbers) for c in cards],
+        )
+
+    @classmethod
+    def from_numbers(cls,
+                     ids: List[int],
+                     winning_numbers: List[List[int]],
+                     our_numbers: List[List[int]]) -> CardStore:
+        # The winning numbers of all cards followed by our numbers of all cards, so that they are ranked together
+        card_numbers = winning_numbers + our_numbers
+        card_sizes = [len(n) for n in card_numbers]
+        flat_numbers = np.fromiter(chain.from_iterable(card_numbers), dtype=np.int64, count=sum(card_sizes))
+        number_ranks, num_distinct_numbers = _rank_numbers(flat_numbers)
+
+        bitmasks = _to_bitmasks(
+            np.repeat(np.arange(len(card_numbers)), card_sizes),
+            number_ranks,
+            len(card_numbers),
+            num_distinct_numbers // 64 + 1,
+        )
+        return cls(np.array(ids, dtype=np.int64), bitmasks[:len(winning_numbers)], bitmasks[len(winning_numbers):])
+
+    def get_num_matches(self) -> np.ndarray:
+        """Same as Card.get_num_matches, but for all the cards at once."""
+        common_numbers = (self.winning_numbers & self.our_numbers).view(np.uint8)
+        return POPCOUNT_TABLE[common_numbers].sum(axis=1)
+
+    def get_points(self) -> List[int]:
+        """Same as Card.get_points, but for all the cards at once."""
+        return _get_points(self.get_num_matches())
 
 
-def main(input_file: str, part: int):
-    cards = read_cards(input_file)
+def main(input_file: str, part: int, bitset: bool = False, stream: bool = False, workers: Optional[int] = None):
+    if stream:
+        # Cards are read lazily and dropped as soon as they have been counted, so only the totals are shown
+        cards = iter_cards(input_file)
+        if part == 1:
+            cards_count_sum = sum(c.get_points() for c in cards)
+            print(f"The cards points sum {cards_count_sum}.")
+        else:
+            cards_count_sum = sum(iter_cards_counts(c.get_num_matches() for c in cards))
+            print(f"The final card count sums {cards_count_sum}.")
+        return cards_count_sum
+
+    if workers:
+        # Cards are parsed in parallel, keeping only their number of matches
+        num_matches = read_num_matches_parallel(input_file, workers)
+        if part == 1:
+            cards_count = _get_points(num_matches)
+        else:
+            cards_count = list(iter_cards_counts(num_matches.tolist()))
+    else:
+        cards = read_card_store(input_file) if bitset else read_cards(input_file)
+        cards_count = get_cards_points(cards) if part == 1 else get_cards_counts(cards)
 
     if part == 1:
-        cards_count = get_cards_points(cards)
         cards_count_sum = sum(cards_count)
         print(f"The cards points are: {cards_count}. They sum {cards_count_sum}.")
         return cards_count_sum
     else:
-        cards_count = get_cards_counts(cards)
         cards_count_sum = sum(cards_count)
         print(f"The final card count is: {cards_count}. They sum {cards_count_sum}.")
         return cards_count_sum
 
 
 def read_cards(file_path: str) -> List[Card]:
-    cards = []
+    return list(iter_cards(file_path))
+
+
+def iter_cards(file_path: str) -> Iterator[Card]:
+    """Lazily yields the cards of the file, or of the standard input if the path is "-"."""
+    for line in _iter_lines(file_path):
+        card_id, winning_numbers, our_numbers = _parse_card(line)
+        yield Card(card_id, set(winning_numbers), set(our_numbers))
+
+
+def _iter_lines(file_path: str) -> Iterator[str]:
+    if file_path == "-":
+        yield from sys.stdin
+        return
+
+    with open(file_path, "r") as f:
+        yield from f
+
+
+def read_card_store(file_path: str) -> CardStore:
+    ids = []
+    winning_numbers = []
+    our_numbers = []
     with open(file_path, "r") as f:
         for line in f:
-            line = line.rstrip()
-            line = line.split(":", 1)
+            card_id, card_winning_numbers, card_our_numbers = _parse_card(line)
+            ids.append(card_id)
+            winning_numbers.append(card_winning_numbers)
+            our_numbers.append(card_our_numbers)
+
+    return CardStore.from_numbers(ids, winning_numbers, our_numbers)
+
+
+def read_num_matches_parallel(file_path: str, max_workers: Optional[int] = None) -> np.ndarray:
+    """
+    Reads the number of matches of each card, splitting the file in chunks of whole lines that are parsed in parallel.
+    Chunks are returned in the same order as they appear in the file.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    file_size = os.path.getsize(file_path)
+    chunk_size = max(math.ceil(file_size / (max_workers * 4)), 1)
+
+    # Move each chunk boundary forward to the start of the next line
+    boundaries = [0]
+    with open(file_path, "rb") as f:
+        for offset in range(chunk_size, file_size, chunk_size):
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset - 1)
+            f.readline()
+            boundaries.append(f.tell())
+    if boundaries[-1] < file_size:
+        boundaries.append(file_size)
 
-            card_id = line[0]
-            card_id = int(card_id.replace("Card ", ""))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = list(executor.map(_read_chunk_num_matches, repeat(file_path), boundaries[:-1], boundaries[1:]))
 
-            winning_numbers, our_numbers = line[1].split(" | ", 1)
-            winning_numbers = set([int(n) for n in winning_numbers.replace("  ", " ").strip().split(" ")])
-            our_numbers = set([int(n) for n in our_numbers.replace("  ", " ").strip().split(" ")])
-            cards.append(Card(card_id, winning_numbers, our_numbers))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
 
-    return cards
 
+def _read_chunk_num_matches(file_path: str, start: int, end: int) -> np.ndarray:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        lines = f.read(end - start).splitlines()
 
-def get_cards_points(cards: List[Card]) -> List[int]:
+    num_matches = []
+    for line in lines:
+        if not line.strip():
+            continue
+        winning_numbers, our_numbers = line.split(b":", 1)[1].split(b"|", 1)
+        num_matches.append(len(set(map(int, winning_numbers.split())).intersection(map(int, our_numbers.split()))))
+
+    return np.array(num_matches, dtype=np.int64)
+
+
+def get_cards_points(cards: Union[List[Card], CardStore]) -> List[int]:
     """Returns the number of points that each card grants, based on the initial understanding of the game."""
+    if isinstance(cards, CardStore):
+        return cards.get_points()
     return [c.get_points() for c in cards]
 
 
-def get_cards_counts(cards: List[Card]) -> List[int]:
+def get_cards_counts(cards: Union[List[Card], CardStore]) -> List[int]:
     """Returns the total number of cards of each ID that you end up with, based on the real rules of the game."""
-    cards_counts = [1] * len(cards)
-    for card_id, card in enumerate(cards):
-        card_count = cards_counts[card_id]
-        for i in range(card.get_num_matches()):
-            new_card_id = card_id + i + 1
-            cards_counts[new_card_id] = cards_counts[new_card_id] + card_count
+    if isinstance(cards, CardStore):
+        num_matches = cards.get_num_matches().tolist()
+    else:
+        num_matches = [c.get_num_matches() for c in cards]
+
+    return list(iter_cards_counts(num_matches))
+
+
+def iter_cards_counts(num_matches: Iterable[int]) -> Iterator[int]:
+    """
+    Yields the total number of cards of each ID, given the number of matches of each card in order.
+    Instead of adding the count of a card to each of the next cards it wins, it is only added to the first one and
+    subtracted from the one after the last one; the count of each card is then the running sum of those differences.
+    Only the differences of the cards not read yet are kept, so memory is bounded by the highest number of matches.
+    """
+    running_count = 0
+    count_differences = deque()  # The first element corresponds to the card right after the current one
+    for card_num_matches in num_matches:
+        running_count += count_differences.popleft() if count_differences else 0
+        card_count = 1 + running_count
+        yield card_count
+
+        if card_num_matches > 0:
+            count_differences.extend([0] * (card_num_matches + 1 - len(count_differences)))
+            count_differences[0] += card_count
+            count_differences[card_num_matches] -= card_count
+
+
+def _parse_card(line: str) -> Tuple[int, List[int], List[int]]:
+    card_id, numbers = line.split(":", 1)
+    winning_numbers, our_numbers = numbers.split("|", 1)
+    return (
+        int(card_id.replace("Card ", "")),
+        [int(n) for n in winning_numbers.split()],
+        [int(n) for n in our_numbers.split()],
+    )
+
+
+def _get_points(num_matches: np.ndarray) -> List[int]:
+    # Python ints, since the points of a card with 63 or more matches do not fit in an int64
+    return [1 << (m - 1) if m else 0 for m in num_matches.tolist()]
+
+
+def _rank_numbers(numbers: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Returns the rank of each number among the distinct ones, and the amount of distinct numbers. If the numbers are
+    small enough, a lookup table of the present numbers is used instead of sorting them.
+    """
+    if len(numbers) and 0 <= numbers.min() and numbers.max() < len(numbers):
+        present = np.zeros(numbers.max() + 1, dtype=bool)
+        present[numbers] = True
+        ranks = np.cumsum(present) - 1
+        return ranks[numbers], int(ranks[-1]) + 1
+
+    distinct_numbers, ranks = np.unique(numbers, return_inverse=True)
+    return ranks.reshape(-1), len(distinct_numbers)
+
 
-    return cards_counts
+def _to_bitmasks(card_idxs: np.ndarray, numbers: np.ndarray, num_cards: int, num_words: int) -> np.ndarray:
+    """
+    Converts the numbers of the cards into rows of 64-bit words, where the bit of each number is set. Both arrays are
+    flat, with the card of each number and the number itself.
+    """
+    numbers = numbers.astype(np.uint64)
+    bitmasks = np.zeros((num_cards, num_words), dtype=np.uint64)
+    word_idxs = (numbers // np.uint64(64)).astype(np.int64)
+    np.bitwise_or.at(bitmasks, (card_idxs, word_idxs), np.left_shift(np.uint64(1), numbers % np.uint64(64)))
+    return bitmasks
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-b", "--bitset", action="store_true",
+                        help="Store the numbers of each card as a bitmask instead of Python sets")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Read the cards lazily; use '-' as input file to read from the standard input")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="Parse the file in chunks with this amount of processes")
     args = parser.parse_args()
 
-    main(args.input_file, args.part)
+    main(args.input_file, args.part, args.bitset, args.stream, args.workers)
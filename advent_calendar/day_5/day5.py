@@ -18,8 +18,18 @@ What is the lowest location number that corresponds to any of the initial seed n
 from __future__ import annotations
 
 import argparse
+import bisect
+import hashlib
+import os
+import re
 from dataclasses import dataclass
-from typing import List, Optional
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+MAX_ID = int(np.iinfo(np.int64).max)  # Excluded; the last interval of a complete mapping ends here
+MAP_HEADER_PATTERN = re.compile(r"(\S+)-to-(\S+) map:")
 
 
 @dataclass
@@ -75,76 +85,395 @@ class Interval:
         return overlaps
 
 
-def main(input_file: str, part: int):
-    almanac = read_almanac(input_file, part)
+@dataclass
+class MappingIndex:
+    """
+    A complete mapping (i.e. with its gaps filled), with its intervals sorted and indexed by their start, so that the
+    interval containing any value can be found by bisection.
+    Intervals may overlap, so the highest end among each interval and all the previous ones is also kept: it tells where
+    to start looking for the intervals that reach a value.
+    """
+    intervals: List[Interval]
+    starts: List[int]
+    max_ends: List[int]
+
+    @classmethod
+    def from_intervals(cls, intervals: List[Interval]) -> MappingIndex:
+        intervals = sorted(intervals, key=lambda i: i.min)
+        return cls(intervals, [i.min for i in intervals], list(accumulate([i.max for i in intervals], max)))
+
+    def find_interval_idx(self, value: int) -> int:
+        return bisect.bisect_right(self.starts, value) - 1
+
+    def map(self, value: int) -> int:
+        return self.intervals[self.find_interval_idx(value)].map(value)
+
+    def compute_overlap(self, seeds: Interval) -> List[Interval]:
+        """
+        Same as Interval.compute_overlap, but only visiting the intervals that may overlap with the seed interval: every
+        interval before the first one whose max_ends reaches the seed interval ends before it, so the walk starts there
+        (found by bisection) and stops at the first interval that starts after the seed interval.
+        """
+        overlaps = []
+        for interval_idx in self.iter_overlapping_idxs(seeds):
+            interval = self.intervals[interval_idx]
+            overlap_min, overlap_max = max(seeds.min, interval.min), min(seeds.max, interval.max)
+            overlaps.append(Interval(interval.map(overlap_min), None, overlap_max - overlap_min + 1))
+
+        return overlaps
+
+    def iter_overlapping_idxs(self, seeds: Interval) -> Iterator[int]:
+        """Yields the indexes of the intervals that overlap with the seed interval, as compute_overlap visits them."""
+        interval_idx = bisect.bisect_left(self.max_ends, seeds.min)
+        while interval_idx < len(self.intervals) and self.intervals[interval_idx].min <= seeds.max:
+            if self.intervals[interval_idx].max >= seeds.min:
+                yield interval_idx
+            interval_idx += 1
+
+    def find_closest_location(self, seeds: Interval) -> int:
+        """
+        Returns the lowest value that the seed interval maps to. Intervals are increasing, so it is enough to map the
+        first value of the seed interval within each of the intervals that overlap with it.
+        """
+        return min([overlap.min for overlap in self.compute_overlap(seeds)])
+
+    def compose(self, other: MappingIndex) -> MappingIndex:
+        """
+        Returns a single mapping equivalent to mapping through this mapping first and through the other one later.
+        Each interval of this mapping is split at the boundaries of the intervals of the other mapping its dst overlaps.
+        """
+        composed_intervals = []
+        for interval in self.intervals:
+            # The other mapping is complete, so the overlaps cover the whole dst of the interval, in order
+            src_start = interval.src_start
+            for overlap in other.compute_overlap(Interval(interval.dst_start, None, interval.length)):
+                composed_intervals.append(Interval(src_start, overlap.src_start, overlap.length))
+                src_start += overlap.length
+
+        return MappingIndex.from_intervals(composed_intervals)
+
+
+@dataclass
+class InverseMappingIndex:
+    """
+    Answers the reverse question of a mapping: which src values map into a window of dst values.
+    The dst values are split in segments at the start and at the end of the dst of every interval of the mapping, and
+    each segment keeps the intervals whose dst covers it; a window only needs to walk the segments it overlaps.
+    Optionally, only the src values within some seed intervals are returned.
+    """
+    intervals: List[Interval]
+    segment_starts: List[int]
+    segment_intervals: List[List[int]]  # Indexes of the intervals covering each segment
+    seeds: Optional[List[Interval]] = None  # Coalesced
+    seed_starts: Optional[List[int]] = None
+
+    @classmethod
+    def from_mapping(cls,
+                     mapping: Union[List[Interval], MappingIndex],
+                     seeds: Optional[List[Interval]] = None) -> InverseMappingIndex:
+        intervals = mapping.intervals if isinstance(mapping, MappingIndex) else mapping
+
+        # Sweep over the dst values, opening each interval at its dst start and closing it after its dst end
+        events = {}
+        for interval_idx, interval in enumerate(intervals):
+            events.setdefault(interval.dst_start, ([], []))[0].append(interval_idx)
+            if interval.dst_start + interval.length < MAX_ID:
+                events.setdefault(interval.dst_start + interval.length, ([], []))[1].append(interval_idx)
+
+        segment_starts = []
+        segment_intervals = []
+        active_intervals = set()
+        for segment_start in sorted(events):
+            opened, closed = events[segment_start]
+            active_intervals.difference_update(closed)
+            active_intervals.update(opened)
+            segment_starts.append(segment_start)
+            segment_intervals.append(sorted(active_intervals))
+
+        if seeds:
+            seeds = coalesce_intervals(seeds)
+            return cls(intervals, segment_starts, segment_intervals, seeds, [s.min for s in seeds])
+        return cls(intervals, segment_starts, segment_intervals)
+
+    def find_sources(self, dst_min: int, dst_max: int) -> List[Interval]:
+        """
+        Returns the src ranges whose dst falls within the window (both ends included), sorted by src. Each of them is an
+        interval with its src and dst starts.
+        """
+        interval_idxs = set()
+        segment_idx = max(bisect.bisect_right(self.segment_starts, dst_min) - 1, 0)
+        while segment_idx < len(self.segment_starts) and self.segment_starts[segment_idx] <= dst_max:
+            interval_idxs.update(self.segment_intervals[segment_idx])
+            segment_idx += 1
+
+        sources = []
+        for interval_idx in interval_idxs:
+            interval = self.intervals[interval_idx]
+            overlap_min = max(dst_min, interval.dst_start)
+            overlap_max = min(dst_max, interval.dst_start + interval.length - 1)
+            if overlap_min <= overlap_max:
+                source = Interval(interval.src_start + (overlap_min - interval.dst_start), overlap_min,
+                                  overlap_max - overlap_min + 1)
+                sources.extend(self._restrict_to_seeds(source) if self.seeds else [source])
+
+        return sorted(sources, key=lambda i: i.min)
+
+    def find_sources_many(self, windows: List[Tuple[int, int]]) -> List[List[Interval]]:
+        """Same as find_sources, for many (dst_min, dst_max) windows."""
+        return [self.find_sources(dst_min, dst_max) for dst_min, dst_max in windows]
+
+    def _restrict_to_seeds(self, source: Interval) -> List[Interval]:
+        restricted = []
+        seed_idx = max(bisect.bisect_right(self.seed_starts, source.min) - 1, 0)
+        while seed_idx < len(self.seeds) and self.seeds[seed_idx].min <= source.max:
+            seed = self.seeds[seed_idx]
+            overlap_min, overlap_max = max(source.min, seed.min), min(source.max, seed.max)
+            if overlap_min <= overlap_max:
+                restricted.append(Interval(overlap_min, source.map(overlap_min), overlap_max - overlap_min + 1))
+            seed_idx += 1
+
+        return restricted
+
+
+@dataclass
+class IntervalSet:
+    """
+    Compact alternative to a list of Interval without dst: the intervals are stored as two parallel arrays, with the
+    start (included) and the end (excluded) of each one, so that a fragment takes 16 bytes instead of a whole object.
+    Operations work on all the intervals at once, and return sets that are sorted and coalesced.
+    """
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @classmethod
+    def from_intervals(cls, intervals: List[Interval]) -> IntervalSet:
+        starts = np.array([i.src_start for i in intervals], dtype=np.int64)
+        lengths = np.array([min(i.length, MAX_ID) for i in intervals], dtype=np.int64)
+        return cls(starts, starts + np.minimum(lengths, MAX_ID - starts)).coalesce()
+
+    def to_intervals(self) -> List[Interval]:
+        return [Interval(start, None, end - start) for start, end in zip(self.starts.tolist(), self.ends.tolist())]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def min(self) -> int:
+        return int(self.starts[0])
+
+    def coalesce(self) -> IntervalSet:
+        """Merges overlapping and adjacent intervals, as coalesce_intervals does."""
+        non_empty = self.starts < self.ends
+        order = np.argsort(self.starts[non_empty], kind="stable")
+        starts, ends = self.starts[non_empty][order], self.ends[non_empty][order]
+        if len(starts) == 0:
+            return IntervalSet(starts, ends)
+
+        # An interval starts a new group unless it starts before the furthest end of the intervals preceding it
+        furthest_ends = np.maximum.accumulate(ends)
+        group_starts = np.concatenate(([True], starts[1:] > furthest_ends[:-1]))
+        group_ends = np.concatenate((group_starts[1:], [True]))
+        return IntervalSet(starts[group_starts], furthest_ends[group_ends])
+
+    def intersect(self, other: IntervalSet) -> IntervalSet:
+        """Returns the values that belong to both sets. Both of them must be coalesced."""
+        # Intervals of the other set that overlap with each interval, as a range of indexes
+        first_idxs = np.searchsorted(other.ends, self.starts, side="right")
+        last_idxs = np.searchsorted(other.starts, self.ends, side="left") - 1
+        self_idxs, other_idxs = _expand_ranges(first_idxs, last_idxs)
+        return IntervalSet(
+            np.maximum(self.starts[self_idxs], other.starts[other_idxs]),
+            np.minimum(self.ends[self_idxs], other.ends[other_idxs]),
+        ).coalesce()
+
+    def map(self, starts: np.ndarray, offsets: np.ndarray) -> IntervalSet:
+        """
+        Maps all the intervals through a normalized mapping (see normalize_mapping): each interval is split at the
+        boundaries of the mapping intervals it overlaps with, and each fragment is shifted by the offset of its own.
+        """
+        ends = np.append(starts[1:], MAX_ID)
+        first_idxs = np.searchsorted(starts, self.starts, side="right") - 1
+        last_idxs = np.searchsorted(starts, self.ends - 1, side="right") - 1
+        self_idxs, mapping_idxs = _expand_ranges(first_idxs, last_idxs)
+        fragment_offsets = offsets[mapping_idxs]
+        return IntervalSet(
+            np.maximum(self.starts[self_idxs], starts[mapping_idxs]) + fragment_offsets,
+            np.minimum(self.ends[self_idxs], ends[mapping_idxs]) + fragment_offsets,
+        ).coalesce()
+
+
+def _expand_ranges(first_idxs: np.ndarray, last_idxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Given, for each position i, a range of indexes from first_idxs[i] to last_idxs[i] (both included, and possibly
+    empty), returns every pair of position and index in those ranges as two parallel arrays.
+    """
+    counts = np.maximum(last_idxs - first_idxs + 1, 0)
+    positions = np.repeat(np.arange(len(counts)), counts)
+    # Within each range, the index grows by one from the first one
+    range_starts = np.cumsum(counts) - counts
+    idxs = first_idxs[positions] + (np.arange(len(positions)) - range_starts[positions])
+    return positions, idxs
+
+
+def main(input_file: str,
+         part: int,
+         vectorized: bool = False,
+         cache_dir: Optional[str] = None,
+         bounded: bool = False,
+         layered: bool = False):
+    if cache_dir:
+        compiled_almanac = compile_almanac(input_file, cache_dir, compose=True)
+        seeds, mappings = compiled_almanac.get_seeds(part), compiled_almanac.get_mappings()
+    else:
+        almanac = read_almanac(input_file, part)
+        seeds, mappings = almanac[0], fill_mappings(*almanac[1:])
 
     if part == 1:
-        seed_locations = find_seed_locations(*almanac)
+        if vectorized:
+            seed_locations = find_seed_locations_vectorized(np.array(seeds, dtype=np.int64), *mappings).tolist()
+        else:
+            seed_to_location = compose_mappings(*mappings)
+            seed_locations = [seed_to_location.map(seed) for seed in seeds]
         min_seed_location = min(seed_locations)
         print(f"Found seed locations {seed_locations}. The closest one is {min_seed_location}.")
         return min_seed_location
+    elif vectorized or bounded or layered:
+        if vectorized:
+            closest_location = find_closest_seed_location_vectorized(seeds, *mappings)
+        elif bounded:
+            closest_location = find_closest_seed_location_bounded(seeds, *mappings)
+        else:
+            closest_location = map_seed_intervals(seeds, *mappings)[0].min
+        print(f"The closest location is: {closest_location}")
+        return closest_location
     else:
-        seeds, mappings = almanac[0], almanac[1:]
-        mappings = fill_mappings(*mappings)
-        final_seed_locations = []
-        find_closest_seed_location(seeds, final_seed_locations, *mappings)
-        closest_location = min([i.min for i in final_seed_locations])
-        print(f"Found {len(final_seed_locations)} final locations. "
-              f"The closest one is: {closest_location}")
+        seed_to_location = compose_mappings(*mappings)
+        closest_location = min([seed_to_location.find_closest_location(seed_interval) for seed_interval in seeds])
+        print(f"Composed all mappings into {len(seed_to_location.intervals)} intervals. "
+              f"The closest location is: {closest_location}")
         return closest_location
 
 
 def read_almanac(file_path: str, part: int):
-    seeds = []
-    seed_to_soil = []
-    soil_to_fertilizer = []
-    fertilizer_to_water = []
-    water_to_light = []
-    light_to_temperature = []
-    temperature_to_humidity = []
-    humidity_to_location = []
-
-    def parse_map(mappings: List[Interval], row: str):
-        dst_start, src_start, length = [int(x) for x in row.split(" ")]
-        mappings.append(Interval(src_start, dst_start, length))
+    """Returns the seeds, followed by every mapping of the almanac in the order they are chained."""
+    seeds, chain = read_almanac_chain(file_path)
+    if part == 2:
+        seeds = _to_seed_intervals(seeds)
+
+    return (seeds, *[mapping for _, _, mapping in chain])
 
+
+def read_almanac_chain(file_path: str) -> Tuple[List[int], List[Tuple[str, str, List[Interval]]]]:
+    """
+    Reads the seeds and any chain of "X-to-Y map:" mappings, where the Y of each mapping is the X of the next one.
+    Each mapping is returned along with its X and Y.
+    """
     with open(file_path, "r") as f:
-        current_map = None
-        for line in f:
-            line = line.rstrip()
-            if line == "":
-                continue
-            elif line.startswith("seeds: "):
-                seeds = [int(x) for x in line.split("seeds: ", 1)[1].split(" ")]
-                if part == 2:
-                    seed_intervals = []
-                    i = 0
-                    while i < len(seeds):
-                        seed_intervals.append(Interval(seeds[i], None, seeds[i + 1]))
-                        i += 2
-                    seeds = seed_intervals
-                continue
-            elif line == "seed-to-soil map:":
-                current_map = seed_to_soil
-            elif line == "soil-to-fertilizer map:":
-                current_map = soil_to_fertilizer
-            elif line == "fertilizer-to-water map:":
-                current_map = fertilizer_to_water
-            elif line == "water-to-light map:":
-                current_map = water_to_light
-            elif line == "light-to-temperature map:":
-                current_map = light_to_temperature
-            elif line == "temperature-to-humidity map:":
-                current_map = temperature_to_humidity
-            elif line == "humidity-to-location map:":
-                current_map = humidity_to_location
-
-            if line.endswith(" map:"):
-                continue
-
-            parse_map(current_map, line)
-
-    return seeds, seed_to_soil, soil_to_fertilizer, fertilizer_to_water, water_to_light, light_to_temperature, temperature_to_humidity, humidity_to_location
+        return _parse_almanac(f)
+
+
+def _parse_almanac(lines: Iterable[str]) -> Tuple[List[int], List[Tuple[str, str, List[Interval]]]]:
+    seeds = []
+    chain = []
+    for line in lines:
+        line = line.rstrip()
+        if line == "":
+            continue
+        elif line.startswith("seeds: "):
+            seeds = [int(x) for x in line.split("seeds: ", 1)[1].split()]
+            continue
+
+        map_header = MAP_HEADER_PATTERN.fullmatch(line)
+        if map_header:
+            src_name, dst_name = map_header.groups()
+            if chain and chain[-1][1] != src_name:
+                raise ValueError(f"Map {src_name}-to-{dst_name} does not follow map {chain[-1][0]}-to-{chain[-1][1]}.")
+            chain.append((src_name, dst_name, []))
+            continue
+
+        dst_start, src_start, length = [int(x) for x in line.split()]
+        chain[-1][2].append(Interval(src_start, dst_start, length))
+
+    return seeds, chain
+
+
+def _to_seed_intervals(seeds: List[int]) -> List[Interval]:
+    """In part 2, the seeds are pairs of the start and length of each seed interval."""
+    return [Interval(seeds[i], None, seeds[i + 1]) for i in range(0, len(seeds), 2)]
+
+
+@dataclass
+class CompiledAlmanac:
+    """
+    An almanac with each mapping normalized (see normalize_mapping) and all of them concatenated into single arrays,
+    which can be stored as a .npz file. The mapping i spans from layer_offsets[i] to layer_offsets[i + 1].
+    """
+    seeds: np.ndarray
+    names: List[str]  # Names of the chain of categories, e.g. ["seed", "soil", ..., "location"]
+    starts: np.ndarray
+    offsets: np.ndarray
+    layer_offsets: np.ndarray
+
+    def get_seeds(self, part: int):
+        seeds = self.seeds.tolist()
+        return _to_seed_intervals(seeds) if part == 2 else seeds
+
+    def get_mappings(self) -> List[List[Interval]]:
+        """Returns the complete mappings, as fill_mappings would."""
+        return [
+            arrays_to_mapping(self.starts[start:end], self.offsets[start:end])
+            for start, end in zip(self.layer_offsets[:-1], self.layer_offsets[1:])
+        ]
+
+    def save(self, file_path: str):
+        with open(file_path, "wb") as f:
+            np.savez(f, seeds=self.seeds, names=np.array(self.names), starts=self.starts, offsets=self.offsets,
+                     layer_offsets=self.layer_offsets)
+
+    @classmethod
+    def load(cls, file_path: str) -> CompiledAlmanac:
+        with np.load(file_path) as data:
+            return cls(data["seeds"], data["names"].tolist(), data["starts"], data["offsets"], data["layer_offsets"])
+
+
+def compile_almanac(file_path: str, cache_dir: Optional[str] = None, compose: bool = False) -> CompiledAlmanac:
+    """
+    Reads and normalizes all the mappings of the almanac, optionally composing them into a single one.
+    If a cache directory is given, the result is stored there, keyed by the hash of the contents of the almanac, so
+    that later calls with the same almanac skip parsing and normalization altogether.
+    """
+    with open(file_path, "rb") as f:
+        contents = f.read()
+
+    cache_file = None
+    if cache_dir:
+        cache_key = hashlib.sha256(contents).hexdigest()
+        cache_file = os.path.join(cache_dir, f"{cache_key}{'-composed' if compose else ''}.npz")
+        if os.path.exists(cache_file):
+            return CompiledAlmanac.load(cache_file)
+
+    seeds, chain = _parse_almanac(contents.decode().splitlines())
+    names = [src_name for src_name, _, _ in chain] + [chain[-1][1]] if chain else []
+    mappings = [mapping for _, _, mapping in chain]
+    if compose and mappings:
+        names = [names[0], names[-1]]
+        mappings = [compose_mappings(*fill_mappings(*mappings)).intervals]
+
+    normalized_mappings = [normalize_mapping(mapping) for mapping in mappings]
+    compiled_almanac = CompiledAlmanac(
+        np.array(seeds, dtype=np.int64),
+        names,
+        np.concatenate([starts for starts, _ in normalized_mappings] or [np.zeros(0, dtype=np.int64)]),
+        np.concatenate([offsets for _, offsets in normalized_mappings] or [np.zeros(0, dtype=np.int64)]),
+        np.cumsum([0] + [len(starts) for starts, _ in normalized_mappings], dtype=np.int64),
+    )
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_cache_file = f"{cache_file}.{os.getpid()}.tmp"
+        compiled_almanac.save(tmp_cache_file)
+        os.replace(tmp_cache_file, cache_file)
+
+    return compiled_almanac
 
 
 def find_seed_locations(seeds: List[int], *mappings: List[Interval]):
@@ -165,9 +494,54 @@ def find_seed_locations(seeds: List[int], *mappings: List[Interval]):
     return locations
 
 
+def find_seed_locations_vectorized(seeds: np.ndarray, *mappings: List[Interval]) -> np.ndarray:
+    """
+    Finds the locations of an array of seeds, mapping all of them through each mapping at once: the interval of each
+    value is found with a binary search over the interval starts, and the offset of that interval is added to it.
+    """
+    locations = np.asarray(seeds, dtype=np.int64)
+    for mapping in mappings:
+        starts, offsets = normalize_mapping(mapping)
+        locations = locations + offsets[np.searchsorted(starts, locations, side="right") - 1]
+
+    return locations
+
+
+def normalize_mapping(mapping: List[Interval]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compact alternative to fill_mappings: converts a mapping (with or without its gaps filled) into two arrays, with the
+    start of each interval of the complete mapping (sorted) and the offset that each of those intervals adds to the
+    values it maps. The last interval covers everything after its start.
+    """
+    src_starts = np.array([i.src_start for i in mapping], dtype=np.int64)
+    dst_starts = np.array([i.dst_start for i in mapping], dtype=np.int64)
+    lengths = np.array([min(i.length, MAX_ID) for i in mapping], dtype=np.int64)
+    order = np.argsort(src_starts, kind="stable")
+    src_starts, dst_starts, lengths = src_starts[order], dst_starts[order], lengths[order]
+    src_ends = src_starts + np.minimum(lengths, MAX_ID - src_starts)  # Excluded
+    offsets = dst_starts - src_starts
+
+    # There is a gap before each interval that does not start where the previous one ends, and after the last one
+    gap_starts = np.concatenate(([0], src_ends))
+    has_gap = gap_starts < np.concatenate((src_starts, [MAX_ID]))
+
+    starts = np.concatenate((src_starts, gap_starts[has_gap]))
+    offsets = np.concatenate((offsets, np.zeros(np.count_nonzero(has_gap), dtype=np.int64)))
+    order = np.argsort(starts, kind="stable")
+    return starts[order], offsets[order]
+
+
+def arrays_to_mapping(starts: np.ndarray, offsets: np.ndarray) -> List[Interval]:
+    """Converts the arrays of a normalized mapping back into a complete mapping."""
+    starts, offsets = starts.tolist(), offsets.tolist()
+    lengths = [next_start - start for start, next_start in zip(starts, starts[1:])] + [MAX_ID - starts[-1]]
+    return [Interval(start, start + offset, length) for start, offset, length in zip(starts, offsets, lengths)]
+
+
 def fill_mappings(*mappings: List[Interval]):
     """
-    To ease computations, fill the gaps between explicit intervals with 1-to-1 mappings.
+    To ease computations, fill the gaps between explicit intervals with 1-to-1 mappings. The last of them covers
+    everything after the last explicit interval, up to MAX_ID.
     """
 
     def create_implicit_interval(start: int, end: int):
@@ -176,33 +550,46 @@ def fill_mappings(*mappings: List[Interval]):
 
     new_mappings = []
     for mapping in mappings:
-        new_intervals = sorted([i for i in mapping], key=lambda i: i.min)
-        if new_intervals[0].min != 0:
-            new_intervals.insert(0, create_implicit_interval(0, new_intervals[0].min))
-        new_intervals.append(create_implicit_interval(new_intervals[-1].max + 1, 100_000_000_000))
-
-        i = 0
-        while i < len(new_intervals) - 1:
-            if new_intervals[i].max + 1 < new_intervals[i + 1].min:
-                new_intervals.insert(i + 1,
-                                     create_implicit_interval(new_intervals[i].max + 1, new_intervals[i + 1].min))
-            i += 1
+        new_intervals = []
+        next_start = 0
+        for interval in sorted(mapping, key=lambda i: i.min):
+            if next_start < interval.min:
+                new_intervals.append(create_implicit_interval(next_start, interval.min))
+            new_intervals.append(interval)
+            next_start = interval.max + 1
+        new_intervals.append(create_implicit_interval(next_start, MAX_ID))
 
         new_mappings.append(new_intervals)
 
     return new_mappings
 
 
+def compose_mappings(*mappings: List[Interval]) -> MappingIndex:
+    """
+    Composes all the complete mappings (as returned by fill_mappings), in order, into a single mapping. For the
+    almanac, this is the mapping from seeds to locations, which only needs to be built once for any amount of seeds.
+    """
+    composed = MappingIndex.from_intervals(mappings[0])
+    for mapping in mappings[1:]:
+        composed = composed.compose(MappingIndex.from_intervals(mapping))
+
+    return composed
+
+
 def find_closest_seed_location(seeds: List[Interval],
                                final_seed_locations: List[Interval],
-                               *mappings: List[Interval]):
+                               *mappings: Union[List[Interval], MappingIndex]):
     """
     Recursively iterates over all "sources", starting with seeds, and following with the corresponding dst mapping
     of each iteration. During the recursion, it populates a list of final locations that is only updated when the last
     mapping level (i.e. humidity-to-location) is reached.
+    Mappings given as a MappingIndex only visit the intervals that overlap with each source.
     """
     for seed_interval in seeds:
-        overlaps = seed_interval.compute_overlap(*mappings[0])
+        if isinstance(mappings[0], MappingIndex):
+            overlaps = mappings[0].compute_overlap(seed_interval)
+        else:
+            overlaps = seed_interval.compute_overlap(*mappings[0])
 
         if len(mappings) == 1:
             final_seed_locations.extend(overlaps)
@@ -210,10 +597,111 @@ def find_closest_seed_location(seeds: List[Interval],
             find_closest_seed_location(overlaps, final_seed_locations, *mappings[1:])
 
 
+def find_closest_seed_location_bounded(seeds: List[Interval], *mappings: Union[List[Interval], MappingIndex]) -> int:
+    """
+    Branch and bound alternative to find_closest_seed_location that only looks for the closest location. Every interval
+    of every mapping gets a lower bound of the locations reachable through it (see get_location_lower_bounds). Sources
+    are then explored depth first, the most promising one first, and any source whose lower bound cannot beat the
+    closest location found so far is dropped before mapping it, whatever the mapping it is at.
+    """
+    indexes = [m if isinstance(m, MappingIndex) else MappingIndex.from_intervals(m) for m in mappings]
+    lower_bounds = get_location_lower_bounds(*indexes)
+
+    def get_lower_bound(layer: int, source: Interval) -> int:
+        return _get_lowest_bound(indexes[layer], lower_bounds[layer], source)
+
+    closest_location = MAX_ID
+    # Stack of (lower bound, mapping, source), with the lowest bound on top
+    sources = sorted([(get_lower_bound(0, s), 0, s) for s in coalesce_intervals(seeds)],
+                     key=lambda source: source[0], reverse=True)
+    while sources:
+        lower_bound, layer, source = sources.pop()
+        if lower_bound >= closest_location:
+            continue
+
+        if layer == len(indexes) - 1:
+            closest_location = min(closest_location, indexes[layer].find_closest_location(source))
+            continue
+
+        overlaps = [(get_lower_bound(layer + 1, o), layer + 1, o) for o in indexes[layer].compute_overlap(source)]
+        sources.extend(sorted(overlaps, key=lambda overlap: overlap[0], reverse=True))
+
+    return closest_location
+
+
+def get_location_lower_bounds(*mappings: MappingIndex) -> List[List[int]]:
+    """
+    Returns, for each interval of each mapping, a value that no location reached through that interval is below.
+    For the last mapping, this is the dst start of each interval. For the previous ones, it is the lowest bound among
+    the intervals of the next mapping that the dst of each interval overlaps with. That may be lower than the actual
+    closest location, when the dst only overlaps with part of those intervals, but it only takes one pass per mapping.
+    """
+    lower_bounds = [[interval.dst_start for interval in mappings[-1].intervals]]
+    for mapping, next_mapping in zip(reversed(mappings[:-1]), reversed(mappings[1:])):
+        lower_bounds.insert(0, [
+            _get_lowest_bound(next_mapping, lower_bounds[0], Interval(interval.dst_start, None, interval.length))
+            for interval in mapping.intervals
+        ])
+
+    return lower_bounds
+
+
+def _get_lowest_bound(mapping: MappingIndex, lower_bounds: List[int], source: Interval) -> int:
+    """Lowest of the lower bounds of the intervals of the mapping that overlap with the source."""
+    return min([lower_bounds[i] for i in mapping.iter_overlapping_idxs(source)], default=MAX_ID)
+
+
+def map_seed_intervals(seeds: List[Interval], *mappings: Union[List[Interval], MappingIndex]) -> List[Interval]:
+    """
+    Iterative alternative to find_closest_seed_location, mapping all sources through one mapping at a time. After each
+    mapping, the resulting intervals are coalesced, so their number is bounded by the number of intervals of the mapping
+    instead of growing with every split.
+    """
+    sources = coalesce_intervals(seeds)
+    for mapping in mappings:
+        index = mapping if isinstance(mapping, MappingIndex) else MappingIndex.from_intervals(mapping)
+        sources = coalesce_intervals([overlap for source in sources for overlap in index.compute_overlap(source)])
+
+    return sources
+
+
+def find_closest_seed_location_vectorized(seeds: List[Interval], *mappings: List[Interval]) -> int:
+    """
+    Same as map_seed_intervals, but with the sources kept as an IntervalSet and mapped through each normalized mapping
+    at once, so that no Interval is created for any of the fragments.
+    """
+    sources = IntervalSet.from_intervals(seeds)
+    for mapping in mappings:
+        sources = sources.map(*normalize_mapping(mapping))
+
+    return sources.min()
+
+
+def coalesce_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Merges overlapping and adjacent intervals, returning them sorted and without a dst."""
+    coalesced = []
+    for interval in sorted(intervals, key=lambda i: i.min):
+        if coalesced and interval.min <= coalesced[-1].max + 1:
+            last = coalesced[-1]
+            last.length = max(last.max, interval.max) - last.min + 1
+        else:
+            coalesced.append(Interval(interval.src_start, None, interval.length))
+
+    return coalesced
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-v", "--vectorized", action="store_true",
+                        help="Map all seeds (or seed intervals) through each mapping at once with NumPy")
+    parser.add_argument("-b", "--bounded", action="store_true",
+                        help="Find the closest location with a branch and bound search (only for part 2)")
+    parser.add_argument("-l", "--layered", action="store_true",
+                        help="Map the seed intervals through one mapping at a time, coalescing them (only for part 2)")
+    parser.add_argument("-c", "--cache-dir",
+                        help="Directory where the compiled almanac is cached, to skip parsing it in later runs")
     args = parser.parse_args()
 
-    main(args.input_file, args.part)
+    main(args.input_file, args.part, args.vectorized, args.cache_dir, args.bounded, args.layered)
@@ -20,8 +20,9 @@ How many ways can you beat the record in this one much longer race?
 *ANSWER: 23632299*
 """
 import argparse
+import math
 from dataclasses import dataclass
-from typing import List
+from typing import List, Tuple
 
 import numpy as np
 
@@ -37,19 +38,99 @@ class Race:
     def get_winning_strategies(self):
         return [d for d in self.get_distance_combinations() if d > self.record]
 
-
-def main(input_file: str, part: int):
-    races = read_races(input_file, part)
-    winning_strategies = [len(r.get_winning_strategies()) for r in races]
-    winning_strategies_mult = np.prod(winning_strategies)
+    def get_num_winning_strategies(self) -> int:
+        """
+        Counts the winning strategies without listing them: holding the button for t milliseconds wins when
+        t * (time - t) > record, i.e. for every t strictly between the roots of t^2 - time * t + record. The roots are
+        approximated with an exact integer square root and then corrected, so arbitrarily large races are supported.
+        """
+        if self.record < 0:
+            # Every strategy wins, even not moving at all
+            return max(self.time, 0)
+
+        # The longest distance is reached holding the button for half the race
+        half_time = self.time // 2
+        if half_time * (self.time - half_time) <= self.record:
+            return 0
+
+        # Lowest winning hold time; the distances are symmetric, so the highest one is time - min_hold_time
+        min_hold_time = (self.time - math.isqrt(self.time * self.time - 4 * self.record)) // 2
+        while min_hold_time * (self.time - min_hold_time) <= self.record:
+            min_hold_time += 1
+        while min_hold_time > 0 and (min_hold_time - 1) * (self.time - min_hold_time + 1) > self.record:
+            min_hold_time -= 1
+
+        return max(self.time - 2 * min_hold_time + 1, 0)
+
+
+# Above these values, time^2 - 4 * record no longer fits in an int64, so races are solved with Python ints instead
+MAX_BATCH_TIME = 2 ** 31
+MAX_BATCH_RECORD = 2 ** 61
+
+
+def main(input_file: str, part: int, batch: bool = False):
+    if batch:
+        winning_strategies = count_winning_strategies(*read_race_table(input_file, part)).tolist()
+    else:
+        races = read_races(input_file, part)
+        winning_strategies = [r.get_num_winning_strategies() for r in races]
+    # Python ints, so that the product cannot overflow
+    winning_strategies_mult = math.prod(winning_strategies)
     print(f"Found the following amount of winning strategies: {winning_strategies}. "
           f"Their product is {winning_strategies_mult}.")
     return winning_strategies_mult
 
 
+def count_winning_strategies(times: np.ndarray, records: np.ndarray) -> np.ndarray:
+    """
+    Same as Race.get_num_winning_strategies, but for whole arrays of races at once: the lowest winning hold time of each
+    race is approximated from the roots of the quadratic with floating point, then corrected with integer arithmetic.
+    Races whose values are too large for int64 are solved one by one with Python ints; in that case, the counts are
+    returned as an array of Python ints (object dtype).
+    """
+    times, records = np.asarray(times), np.asarray(records)
+    in_range = (np.abs(times) < MAX_BATCH_TIME) & (np.abs(records) < MAX_BATCH_RECORD)
+    if not np.all(in_range):
+        counts = np.empty(len(times), dtype=object)
+        counts[in_range] = count_winning_strategies(times[in_range], records[in_range]).tolist()
+        counts[~in_range] = [
+            Race(int(time), int(record)).get_num_winning_strategies()
+            for time, record in zip(times[~in_range], records[~in_range])
+        ]
+        return counts
+
+    times, records = times.astype(np.int64), records.astype(np.int64)
+    half_times = times // 2
+    wins = half_times * (times - half_times) > records
+
+    discriminants = np.maximum(times * times - 4 * records, 0)
+    min_hold_times = np.floor((times - np.sqrt(discriminants)) / 2).astype(np.int64)
+    # The floating point root is off by one at most, so a single correction step on each side is enough
+    min_hold_times += min_hold_times * (times - min_hold_times) <= records
+    min_hold_times -= (min_hold_times > 0) & ((min_hold_times - 1) * (times - min_hold_times + 1) > records)
+
+    counts = np.where(wins, np.maximum(times - 2 * min_hold_times + 1, 0), 0)
+    # Every strategy wins, even not moving at all
+    return np.where(records < 0, np.maximum(times, 0), counts)
+
+
 def read_races(file_path: str, part: int) -> List[Race]:
-    races = []
+    return [Race(time, record) for time, record in zip(*_read_times_and_records(file_path, part))]
+
 
+def read_race_table(file_path: str, part: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads the times and records of all races as two arrays. Values that do not fit in an int64 are kept as Python ints
+    (object dtype), so that count_winning_strategies solves them exactly.
+    """
+    times, records = _read_times_and_records(file_path, part)
+    try:
+        return np.array(times, dtype=np.int64), np.array(records, dtype=np.int64)
+    except OverflowError:
+        return np.array(times, dtype=object), np.array(records, dtype=object)
+
+
+def _read_times_and_records(file_path: str, part: int) -> Tuple[List[int], List[int]]:
     with open(file_path, "r") as f:
         line_id = 0
         times = []
@@ -68,16 +149,15 @@ def read_races(file_path: str, part: int) -> List[Race]:
                     records = [int("".join(line.replace("Distance:", "").split()))]
             line_id += 1
 
-        for time, record in zip(times, records):
-            races.append(Race(time, record))
-
-    return races
+    return times, records
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--input-file", required=True)
     parser.add_argument("-p", "--part", type=int, choices=[1, 2], required=True)
+    parser.add_argument("-b", "--batch", action="store_true",
+                        help="Solve all races at once with NumPy")
     args = parser.parse_args()
 
-    main(args.input_file, args.part)
+    main(args.input_file, args.part, args.batch)
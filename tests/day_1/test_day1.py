@@ -1,5 +1,6 @@
 import os.path
 
+import numpy as np
 import pytest
 
 from advent_calendar.day_1 import day1
@@ -25,12 +26,55 @@ def test_day1_should_return_calibration_value_for_part2():
     assert 281 == day1.main(calibration_file, part=2)
 
 
+@pytest.mark.parametrize(
+    "file_name,part,output",
+    [
+        ("calibration_file_part1.txt", 1, 142),
+        ("calibration_file_part2.txt", 2, 281),
+    ]
+)
+def test_day1_should_return_same_calibration_value_when_streaming(file_name, part, output):
+    calibration_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        file_name,
+    )
+
+    assert output == day1.main(calibration_file, part=part, stream=True)
+
+
+@pytest.mark.parametrize(
+    "file_name,part,output",
+    [
+        ("calibration_file_part1.txt", 1, 142),
+        ("calibration_file_part2.txt", 2, 281),
+    ]
+)
+def test_day1_should_return_same_calibration_value_when_vectorized(file_name, part, output):
+    calibration_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        file_name,
+    )
+
+    assert output == day1.main(calibration_file, part=part, vectorized=True)
+
+
+def test_find_calibration_value_vectorized_should_handle_overlapping_words():
+    buffer = np.frombuffer(b"eighthree\nsevenine\none4one56bnhf\n\ntwone", dtype=np.uint8)
+
+    assert 83 + 79 + 16 + 21 == day1.find_calibration_value_vectorized(buffer, part=2)
+
+
 @pytest.mark.parametrize(
     "word,output",
     [
         ("eightthree", 83),
         ("sevenine", 79),
         ("one4one56bnhf", 16),
+        ("eighthree", 83),
+        ("xtwone", 21),
+        ("oneightwo", 12),
     ]
 )
 def test_day1_should_return_calibration_value_for_part2_with_special_cases(word, output):
@@ -43,3 +87,16 @@ def test_day1_should_return_calibration_value_for_part2_with_special_cases(word,
     words = [word]
 
     assert output == day1.find_calibration_value_numbers_and_words(words)
+
+
+@pytest.mark.parametrize(
+    "word,first_and_last",
+    [
+        ("treb7uchet", (7, 7)),
+        ("twoneight", (2, 8)),
+        ("sevenin", (7, 7)),
+        ("3nineight", (3, 8)),
+    ]
+)
+def test_find_first_and_last_number_should_handle_overlapping_words(word, first_and_last):
+    assert first_and_last == day1.find_first_and_last_number(word)
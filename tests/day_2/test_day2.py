@@ -1,5 +1,7 @@
 import os.path
 
+import numpy as np
+
 from advent_calendar.day_2 import day2
 
 
@@ -32,3 +34,100 @@ def test_day2_should_return_sum_of_powers_of_minimum_sets_in_part2():
     )
 
     assert 2286 == day2.main(input_file, None, 2)
+
+
+def test_day2_columnar_games_should_return_same_answers():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input_part1_custom.txt",
+    )
+
+    games = day2.read_input(input_file)
+    table = day2.read_game_table(input_file)
+
+    assert table.find_minimum_sets().tolist() == [list(g.find_minimum_set()) for g in games]
+    assert day2.GameTable.from_games(games).find_minimum_sets().tolist() == table.find_minimum_sets().tolist()
+    assert day2.main(input_file, (12, 13, 14), 1, columnar=True) == day2.main(input_file, (12, 13, 14), 1)
+    assert day2.main(input_file, None, 2, columnar=True) == day2.main(input_file, None, 2)
+
+
+def test_possible_games_index_should_answer_many_bag_contents():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input_part1_custom.txt",
+    )
+    games = day2.read_input(input_file)
+    bag_contents = [(12, 13, 14), (0, 0, 0), (20, 13, 15), (4, 3, 6), (100, 100, 100)]
+
+    index = day2.PossibleGamesIndex.from_games(games)
+
+    assert index.query(bag_contents).tolist() == [
+        sum(g.id for g in games if g.is_possible(*bag_content)) for bag_content in bag_contents
+    ]
+    assert day2.PossibleGamesIndex.from_games(day2.GameTable.from_games(games)).query(bag_contents).tolist() == \
+        index.query(bag_contents).tolist()
+
+
+def test_tokenize_games_should_return_every_count_of_cubes():
+    lines = [
+        "Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green",
+        "Game 12: 20 red",
+    ]
+
+    assert list(day2.tokenize_games(lines)) == [
+        (1, 0, 2, 3),
+        (1, 0, 0, 4),
+        (1, 1, 0, 1),
+        (1, 1, 1, 2),
+        (1, 1, 2, 6),
+        (1, 2, 1, 2),
+        (12, 0, 0, 20),
+    ]
+
+
+def test_tokenize_game_table_should_return_same_table_as_games():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input_part1_custom.txt",
+    )
+    with open(input_file, "rb") as f:
+        buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    table = day2.tokenize_game_table(buffer)
+    expected_table = day2.GameTable.from_games(day2.read_input(input_file))
+
+    assert table.ids.tolist() == expected_table.ids.tolist()
+    assert table.samples.tolist() == expected_table.samples.tolist()
+    assert table.offsets.tolist() == expected_table.offsets.tolist()
+
+
+def test_find_possible_games_and_minimum_sets_should_solve_both_parts_at_once():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input_part1.txt",
+    )
+
+    with open(input_file, "r") as f:
+        answers = day2.find_possible_games_and_minimum_sets(f, (12, 13, 14))
+
+    assert answers == (1 + 2 + 5, 2286)
+    assert day2.main(input_file, (12, 13, 14), 1, stream=True) == 1 + 2 + 5
+    assert day2.main(input_file, None, 2, stream=True) == 2286
+
+
+def test_possible_games_index_should_fall_back_to_fenwick_tree_when_prefix_sum_is_too_large():
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, 301, dtype=np.int64)
+    minimum_sets = rng.integers(0, 2000, size=(300, 3))
+    bag_contents = np.vstack((rng.integers(0, 2000, size=(50, 3)), [[-1, 5, 5], [1999, -1, 1999], [0, 0, 0]]))
+
+    index = day2.PossibleGamesIndex.from_minimum_sets(ids, minimum_sets, max_cells=1000)
+
+    assert index.id_sums is None and index.green_blue_tree is not None
+    assert index.query(bag_contents).tolist() == [
+        int(ids[np.all(minimum_sets <= bag_content, axis=1)].sum()) for bag_content in bag_contents
+    ]
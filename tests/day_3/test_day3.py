@@ -48,3 +48,91 @@ def test_get_numbers_adjacent_to_gear_should_return_all_gears():
     assert gears == {
         (1, 2): [1, 4],
     }
+
+
+def test_get_numbers_adjacent_to_symbol_vectorized_should_return_same_numbers():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    schematic = day3.read_schematic(input_file)
+    # Letters are not symbols, and numbers at the end of a row do not continue on the next one
+    schematic.extend(["..*.....99", "12.a34...."])
+
+    numbers = day3.get_numbers_adjacent_to_symbol_vectorized(schematic)
+
+    assert numbers == day3.get_numbers_adjacent_to_symbol(schematic)
+
+
+def test_schematic_index_should_return_gears_with_any_number_of_numbers():
+    schematic = [
+        "1.2.....",
+        ".*...*..",
+        "3.4..5..",
+    ]
+    index = day3.build_schematic_index(schematic)
+
+    assert index.get_part_numbers() == [1, 2, 3, 4, 5]
+    assert index.get_gears() == {}
+    assert index.get_gears(num_numbers=4) == {(1, 1): [1, 2, 3, 4]}
+    assert index.get_gears(num_numbers=1) == {(1, 5): [5]}
+
+
+def test_stream_schematic_should_return_parts_and_gears_row_by_row():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    schematic = day3.read_schematic(input_file)
+
+    rows = list(day3.stream_schematic(iter(schematic)))
+
+    assert [row_idx for row_idx, _, _ in rows] == list(range(len(schematic)))
+    assert sorted([n for _, part_numbers, _ in rows for n in part_numbers]) == \
+        day3.get_numbers_adjacent_to_symbol(schematic)
+    assert {k: v for _, _, gears in rows for k, v in gears.items()} == day3.get_numbers_adjacent_to_gear(schematic)
+    assert day3.main(input_file, part=1, stream=True) == 4361
+    assert day3.main(input_file, part=2, stream=True) == 467835
+
+
+def test_editable_schematic_should_keep_sums_up_to_date_after_edits():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    schematic = day3.EditableSchematic(day3.read_schematic(input_file))
+    edits = [
+        (0, 3, "5"),  # Merges 467 with a new digit
+        (1, 3, "."),  # Removes the gear between 467 and 35
+        (2, 4, "1"),  # Joins 35 and 633 into a single number
+        (2, 5, "*"),  # Splits it again with a gear
+        (9, 4, "9"),  # Merges 664 and 598
+        (8, 3, "."),
+    ]
+
+    for row_idx, col_idx, character in edits:
+        schematic.set_cell(row_idx, col_idx, character)
+        expected_schematic = schematic.to_schematic()
+
+        assert schematic.part_numbers_sum == sum(day3.get_numbers_adjacent_to_symbol(expected_schematic))
+        assert schematic.gear_ratios_sum == sum(
+            [a * b for a, b in day3.get_numbers_adjacent_to_gear(expected_schematic).values()]
+        )
+
+
+def test_parallel_engine_should_return_same_numbers_and_gears():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    schematic = day3.read_schematic(input_file)
+
+    # With 3 workers, bands have a single row, so every gear and part number needs the halo rows
+    assert day3.get_numbers_adjacent_to_symbol_parallel(schematic, max_workers=3) == \
+        day3.get_numbers_adjacent_to_symbol(schematic)
+    assert day3.get_numbers_adjacent_to_gear_parallel(schematic, max_workers=3) == \
+        day3.get_numbers_adjacent_to_gear(schematic)
@@ -27,3 +27,75 @@ def test_get_cards_counts():
     points = day4.get_cards_counts(cards)
 
     assert points == [1, 2, 4, 8, 14, 1]
+
+
+def test_card_store_should_return_same_points_and_counts():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    cards = day4.read_card_store(input_file)
+
+    assert day4.get_cards_points(cards) == [8, 2, 2, 1, 0, 0]
+    assert day4.get_cards_counts(cards) == [1, 2, 4, 8, 14, 1]
+
+
+def test_card_store_should_support_numbers_of_any_size():
+    cards = [
+        day4.Card(1, {1, 63, 64, 200}, {63, 64, 200, 201}),
+        day4.Card(2, {0}, {1}),
+        day4.Card(3, {10 ** 12}, {10 ** 12, 1}),
+    ]
+
+    store = day4.CardStore.from_cards(cards)
+
+    # Only the 7 distinct numbers take a bit, however high they are
+    assert store.winning_numbers.shape == (3, 1)
+    assert store.get_num_matches().tolist() == [3, 0, 1]
+
+
+def test_card_store_points_should_not_overflow():
+    cards = [day4.Card(1, set(range(64)), set(range(64))), day4.Card(2, set(range(63)), set(range(63)))]
+
+    assert day4.CardStore.from_cards(cards).get_points() == [c.get_points() for c in cards] == [2 ** 63, 2 ** 62]
+
+
+def test_iter_cards_counts_should_only_count_the_cards_read():
+    assert list(day4.iter_cards_counts([4, 2, 2, 1, 0, 0])) == [1, 2, 4, 8, 14, 1]
+    assert list(day4.iter_cards_counts([])) == []
+
+
+def test_stream_mode_should_return_totals():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    assert day4.main(input_file, part=1, stream=True) == 13
+    assert day4.main(input_file, part=2, stream=True) == 30
+
+
+def test_read_num_matches_parallel_should_keep_cards_in_order():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    # With 4 workers, the file is split in chunks smaller than a line
+    num_matches = day4.read_num_matches_parallel(input_file, max_workers=4)
+
+    assert num_matches.tolist() == [c.get_num_matches() for c in day4.read_cards(input_file)]
+    assert day4.main(input_file, part=2, workers=4) == 30
+
+
+def test_read_num_matches_parallel_should_compare_numbers_by_value(tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("Card 1: 07 41 | 7 41\nCard 2: 1 2 | 01 3\n")
+
+    num_matches = day4.read_num_matches_parallel(str(input_file), max_workers=2)
+
+    assert num_matches.tolist() == [c.get_num_matches() for c in day4.read_cards(str(input_file))] == [2, 1]
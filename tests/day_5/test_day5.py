@@ -1,5 +1,7 @@
 import os
 
+import numpy as np
+
 from advent_calendar.day_5 import day5
 from advent_calendar.day_5.day5 import Interval
 
@@ -59,3 +61,227 @@ def test_compute_overlap():
     assert overlaps[2].max == 3001
     assert overlaps[3].min == 4000
     assert overlaps[3].max == 4002
+
+
+def test_compose_mappings_should_map_seeds_straight_to_locations():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=1)
+    seeds, mappings = almanac[0], almanac[1:]
+
+    seed_to_location = day5.compose_mappings(*day5.fill_mappings(*mappings))
+
+    assert [seed_to_location.map(seed) for seed in range(100)] == day5.find_seed_locations(list(range(100)), *mappings)
+    assert seed_to_location.find_closest_location(Interval(79, None, 14)) == 46
+    assert seed_to_location.find_closest_location(Interval(55, None, 13)) == 56
+
+
+def test_part1():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    location = day5.main(input_file, part=1)
+
+    assert location == 35
+
+
+def test_find_seed_locations_vectorized():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=1)
+    seeds, mappings = almanac[0], almanac[1:]
+
+    locations = day5.find_seed_locations_vectorized(np.arange(200), *day5.fill_mappings(*mappings))
+
+    assert locations.tolist() == day5.find_seed_locations(list(range(200)), *mappings)
+    assert day5.main(input_file, part=1, vectorized=True) == 35
+
+
+def test_mapping_index_compute_overlap_should_return_same_overlaps():
+    mapping = [
+        Interval(1, 1000, 3),
+        Interval(3, 2000, 5),
+        Interval(10, 3000, 2),
+        Interval(12, 4000, 8),
+        Interval(20, 5000, 10),
+    ]
+    mapping = day5.fill_mappings(mapping)[0]
+    index = day5.MappingIndex.from_intervals(mapping)
+
+    # Interval(3, None, 1) is reached by both Interval(1, 1000, 3) and Interval(3, 2000, 5), which overlap
+    for seeds in [Interval(5, None, 10), Interval(0, None, 1), Interval(8, None, 2), Interval(25, None, 100),
+                  Interval(3, None, 1), Interval(2, None, 4)]:
+        assert index.compute_overlap(seeds) == seeds.compute_overlap(*mapping)
+
+
+def test_find_closest_seed_location_with_mapping_indexes():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=2)
+    seeds, mappings = almanac[0], day5.fill_mappings(*almanac[1:])
+
+    final_seed_locations = []
+    day5.find_closest_seed_location(seeds, final_seed_locations, *mappings)
+    indexed_final_seed_locations = []
+    day5.find_closest_seed_location(
+        seeds, indexed_final_seed_locations, *[day5.MappingIndex.from_intervals(m) for m in mappings]
+    )
+
+    assert indexed_final_seed_locations == final_seed_locations
+    assert min([i.min for i in indexed_final_seed_locations]) == 46
+
+
+def test_coalesce_intervals():
+    intervals = [Interval(10, None, 5), Interval(0, None, 3), Interval(3, None, 2), Interval(12, None, 10)]
+
+    assert day5.coalesce_intervals(intervals) == [Interval(0, None, 5), Interval(10, None, 12)]
+
+
+def test_find_closest_seed_location_bounded():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=2)
+    seeds, mappings = almanac[0], day5.fill_mappings(*almanac[1:])
+
+    locations = day5.map_seed_intervals(seeds, *mappings)
+
+    assert locations == day5.coalesce_intervals(locations)
+    assert locations[0].min == 46
+    assert day5.main(input_file, part=2, layered=True) == 46
+    assert day5.find_closest_seed_location_bounded(seeds, *mappings) == 46
+    assert day5.main(input_file, part=2, bounded=True) == 46
+
+
+def test_get_location_lower_bounds_should_not_exceed_reachable_locations():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    mappings = [day5.MappingIndex.from_intervals(m) for m in day5.fill_mappings(*day5.read_almanac(input_file, 1)[1:])]
+
+    lower_bounds = day5.get_location_lower_bounds(*mappings)
+
+    seed_to_location = day5.compose_mappings(*[m.intervals for m in mappings])
+    for interval, lower_bound in zip(mappings[0].intervals, lower_bounds[0]):
+        assert lower_bound <= seed_to_location.find_closest_location(interval)
+
+
+def test_fill_mappings_should_not_limit_ids():
+    mapping = [Interval(200_000_000_000, 5, 10), Interval(10, 300_000_000_000, 5)]
+
+    filled_mapping = day5.fill_mappings(mapping)[0]
+
+    assert [(i.src_start, i.dst_start) for i in filled_mapping] == [
+        (0, 0), (10, 300_000_000_000), (15, 15), (200_000_000_000, 5), (200_000_000_010, 200_000_000_010),
+    ]
+    assert filled_mapping[-1].max == day5.MAX_ID - 1
+    assert len(range(filled_mapping[-1].min, filled_mapping[-1].max + 1)) == day5.MAX_ID - 200_000_000_010
+    assert day5.compose_mappings(filled_mapping).map(400_000_000_000) == 400_000_000_000
+
+
+def test_normalize_mapping_should_return_complete_mapping():
+    mapping = [Interval(200_000_000_000, 5, 10), Interval(10, 300_000_000_000, 5), Interval(0, 7, 10)]
+
+    starts, offsets = day5.normalize_mapping(mapping)
+
+    assert day5.arrays_to_mapping(starts, offsets) == day5.fill_mappings(mapping)[0]
+    assert day5.normalize_mapping(day5.fill_mappings(mapping)[0])[0].tolist() == starts.tolist()
+
+
+def test_inverse_mapping_index_should_return_seeds_of_location_windows():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=2)
+    seeds, mappings = almanac[0], day5.fill_mappings(*almanac[1:])
+    seed_to_location = day5.compose_mappings(*mappings)
+    windows = [(0, 10), (46, 46), (40, 60), (90, 200)]
+
+    index = day5.InverseMappingIndex.from_mapping(seed_to_location)
+    seeds_index = day5.InverseMappingIndex.from_mapping(seed_to_location, seeds)
+
+    for (dst_min, dst_max), sources in zip(windows, index.find_sources_many(windows)):
+        expected_seeds = [s for s in range(1000) if dst_min <= seed_to_location.map(s) <= dst_max]
+        assert sorted([s for i in sources for s in range(i.min, i.max + 1) if s < 1000]) == expected_seeds
+        assert all([seed_to_location.map(i.src_start) == i.dst_start for i in sources])
+    assert seeds_index.find_sources(46, 46) == [Interval(82, 46, 1)]
+
+
+def test_read_almanac_chain_should_read_any_chain_of_maps():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    seeds, chain = day5.read_almanac_chain(input_file)
+
+    assert seeds == [79, 14, 55, 13]
+    assert [(src_name, dst_name) for src_name, dst_name, _ in chain][:2] == [("seed", "soil"), ("soil", "fertilizer")]
+    assert chain[-1][1] == "location"
+    assert chain[0][2] == [Interval(98, 50, 2), Interval(50, 52, 48)]
+
+
+def test_compile_almanac_should_cache_compiled_mappings(tmp_path):
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    compiled_almanac = day5.compile_almanac(input_file, str(tmp_path))
+    cached_almanac = day5.compile_almanac(input_file, str(tmp_path))
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert cached_almanac.names == [
+        "seed", "soil", "fertilizer", "water", "light", "temperature", "humidity", "location",
+    ]
+    assert cached_almanac.get_mappings() == compiled_almanac.get_mappings()
+    assert cached_almanac.get_mappings() == day5.fill_mappings(*day5.read_almanac(input_file, part=1)[1:])
+    assert day5.main(input_file, part=1, cache_dir=str(tmp_path)) == 35
+    assert day5.main(input_file, part=2, cache_dir=str(tmp_path)) == 46
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_interval_set_should_coalesce_and_intersect():
+    intervals = [Interval(10, None, 5), Interval(0, None, 3), Interval(3, None, 2), Interval(12, None, 10)]
+    interval_set = day5.IntervalSet.from_intervals(intervals)
+
+    assert interval_set.to_intervals() == day5.coalesce_intervals(intervals)
+    assert interval_set.intersect(day5.IntervalSet.from_intervals([Interval(2, None, 10), Interval(20, None, 5)])) \
+        .to_intervals() == [Interval(2, None, 3), Interval(10, None, 2), Interval(20, None, 2)]
+
+
+def test_find_closest_seed_location_vectorized():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+    almanac = day5.read_almanac(input_file, part=2)
+    seeds, mappings = almanac[0], day5.fill_mappings(*almanac[1:])
+
+    locations = day5.IntervalSet.from_intervals(seeds)
+    for mapping in mappings:
+        locations = locations.map(*day5.normalize_mapping(mapping))
+
+    assert locations.to_intervals() == day5.map_seed_intervals(seeds, *mappings)
+    assert day5.main(input_file, part=2, vectorized=True) == 46
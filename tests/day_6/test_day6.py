@@ -1,5 +1,7 @@
 import os
 
+import numpy as np
+
 from advent_calendar.day_6 import day6
 
 
@@ -45,3 +47,38 @@ def test_part1_should_return_product_of_winning_strategies():
     result = day6.main(input_file, part=1)
 
     assert result == 288
+
+
+def test_get_num_winning_strategies_should_count_winning_strategies():
+    for time in range(30):
+        for record in range(-1, time * time // 4 + 2):
+            race = day6.Race(time, record)
+            assert race.get_num_winning_strategies() == len(race.get_winning_strategies())
+
+    assert day6.Race(71530, 940200).get_num_winning_strategies() == 71503
+    assert day6.Race(10 ** 30, 10 ** 60 // 4 - 1).get_num_winning_strategies() == 1
+
+
+def test_count_winning_strategies_should_match_races_in_and_out_of_int64_range():
+    times = np.repeat(np.arange(30), 10)
+    records = np.tile(np.arange(-1, 9), 30) * 20
+
+    counts = day6.count_winning_strategies(times, records)
+
+    assert counts.tolist() == [day6.Race(int(t), int(r)).get_num_winning_strategies() for t, r in zip(times, records)]
+
+    times = np.array([10 ** 30, 7, 2 ** 40], dtype=object)
+    records = np.array([10 ** 60 // 4 - 1, 9, 0], dtype=object)
+
+    assert day6.count_winning_strategies(times, records).tolist() == [1, 4, 2 ** 40 - 1]
+
+
+def test_part2_should_return_product_of_winning_strategies_in_batch():
+    input_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "resources",
+        "input.txt",
+    )
+
+    assert day6.main(input_file, part=1, batch=True) == 288
+    assert day6.main(input_file, part=2, batch=True) == 71503